@@ -19,54 +19,70 @@ import os
 import random
 import re
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
 from typing import Optional
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is optional; it is noticeably faster for the manifest
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Northeastern (NE) Course Descriptions entry point
 INDEX_URL = "https://catalog.northeastern.edu/course-descriptions/"
 
+# Subject pages are fetched concurrently; keep this small to stay polite.
+MAX_WORKERS = 8
+
+# href="/course-descriptions/<slug>/" (optionally absolute on the catalog host,
+# optionally with a query/fragment, which is dropped)
+SUBJECT_HREF_RE = re.compile(
+    r"""(?i:href)\s*=\s*["']\s*(?:https?://catalog\.northeastern\.edu)?"""
+    r"""(/course-descriptions/[a-z0-9-]+/)(?:[?#][^"']*)?\s*["']"""
+)
 
-@dataclass
+
+@dataclass(slots=True)
 class DownloadRecord:
     url: str
     path: str
     kind: str  # "index" or "subject"
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
 
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def _canonicalize(url: str) -> str:
-    """Drop query/fragment so URLs are stable."""
-    p = urlparse(url)
-    return urlunparse(p._replace(query="", fragment=""))
-
-
 def _request_with_retries(
     session: requests.Session,
     url: str,
     *,
     timeout: int = 30,
-    max_retries: int = 5,
-    backoff_base: float = 1.7,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
 ) -> requests.Response:
-    last_err: Optional[Exception] = None
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = session.get(url, timeout=timeout)
-            resp.raise_for_status()
-            return resp
-        except Exception as e:
-            last_err = e
-            sleep_s = (backoff_base**attempt) + random.random()
-            print(f"[warn] GET failed (attempt {attempt}/{max_retries}): {url}\n       {e}\n       sleeping {sleep_s:.2f}s")
-            time.sleep(sleep_s)
-    raise RuntimeError(f"Failed to GET after {max_retries} retries: {url}") from last_err
+    """
+    GET through the session; retries/backoff are handled by the
+    urllib3 Retry policy mounted on the session (see main()).
+    Pass etag/last_modified to make the request conditional (may return 304).
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    resp = session.get(url, timeout=timeout, headers=headers)
+    resp.raise_for_status()
+    return resp
 
 
 def _save_html(path: str, html: str) -> None:
@@ -74,35 +90,58 @@ def _save_html(path: str, html: str) -> None:
         f.write(html)
 
 
+def _load_previous_manifest(path: str) -> dict[str, DownloadRecord]:
+    """Records from the last run keyed by URL (empty on first run)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        rows = orjson.loads(f.read()) if orjson is not None else json.load(f)
+    return {r["url"]: DownloadRecord(**r) for r in rows}
+
+
+def _fetch_to_disk(
+    session: requests.Session,
+    url: str,
+    path: str,
+    kind: str,
+    previous: Optional[DownloadRecord],
+) -> DownloadRecord:
+    """
+    Download url into path. If an earlier run saved this page and recorded
+    its validators, ask the server whether it changed; on 304 keep the file.
+    """
+    cached = previous if previous is not None and os.path.exists(path) else None
+    resp = _request_with_retries(
+        session,
+        url,
+        etag=cached.etag if cached else None,
+        last_modified=cached.last_modified if cached else None,
+    )
+    if cached and resp.status_code == 304:
+        return DownloadRecord(url=url, path=path, kind=kind, etag=cached.etag, last_modified=cached.last_modified)
+
+    _save_html(path, resp.text)
+    return DownloadRecord(
+        url=url,
+        path=path,
+        kind=kind,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+    )
+
+
 def _extract_subject_links(index_html: str) -> list[str]:
     """
     NE has one page per subject, e.g.:
       https://catalog.northeastern.edu/course-descriptions/arch/
       https://catalog.northeastern.edu/course-descriptions/cs/
     This function extracts those subject URLs from the index page.
+    The catalog links them root-relative or absolute, so a regex over the
+    raw href attributes is enough (no HTML parse).
     """
-    soup = BeautifulSoup(index_html, "html.parser")
     links: set[str] = set()
-
-    for a in soup.select("a[href]"):
-        href = (a.get("href") or "").strip()
-        if not href:
-            continue
-
-        abs_url = _canonicalize(urljoin(INDEX_URL, href))
-        p = urlparse(abs_url)
-
-        if p.netloc != "catalog.northeastern.edu":
-            continue
-        if not p.path.startswith("/course-descriptions/"):
-            continue
-        if p.path.rstrip("/") == "/course-descriptions":
-            continue
-
-        # keep only /course-descriptions/<slug>/
-        if re.fullmatch(r"/course-descriptions/[a-z0-9-]+/", p.path):
-            links.add(abs_url)
-
+    for m in SUBJECT_HREF_RE.finditer(index_html):
+        links.add(urljoin(INDEX_URL, m.group(1)))
     return sorted(links)
 
 
@@ -113,6 +152,17 @@ def _subject_slug(url: str) -> str:
     return parts[-1] if parts else "unknown"
 
 
+def _fetch_subject(
+    session: requests.Session,
+    subjects_dir: str,
+    previous: dict[str, DownloadRecord],
+    url: str,
+) -> DownloadRecord:
+    time.sleep(random.uniform(0.1, 0.3))  # polite jitter per request
+    path = os.path.join(subjects_dir, f"{_subject_slug(url)}.html")
+    return _fetch_to_disk(session, url, path, "subject", previous.get(url))
+
+
 def main() -> None:
     # Output layout (simple + predictable)
     out_dir = os.path.join("data", "raw_ne")
@@ -125,41 +175,54 @@ def main() -> None:
         {
             "User-Agent": "sensemaking-pset/01_pull (student scraper)",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Connection": "keep-alive",
+            # Accept-Encoding is left to requests: gzip/deflate, plus br
+            # whenever a brotli decoder is installed
         }
     )
+    # One host, so a single pool sized for the worker threads keeps every
+    # connection alive and reused; urllib3 retries transient failures.
+    retry = Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS, max_retries=retry)
+    session.mount("https://", adapter)
 
     manifest: list[DownloadRecord] = []
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    previous = _load_previous_manifest(manifest_path)
 
     # 1) Download index page
     print(f"[info] Fetching index: {INDEX_URL}")
-    index_resp = _request_with_retries(session, INDEX_URL)
-    index_html = index_resp.text
-
     index_path = os.path.join(out_dir, "index.html")
-    _save_html(index_path, index_html)
-    manifest.append(DownloadRecord(url=INDEX_URL, path=index_path, kind="index"))
+    manifest.append(_fetch_to_disk(session, INDEX_URL, index_path, "index", previous.get(INDEX_URL)))
+    with open(index_path, encoding="utf-8") as f:
+        index_html = f.read()
 
     # 2) Extract + download each subject page
     subject_urls = _extract_subject_links(index_html)
     print(f"[info] Found {len(subject_urls)} subject pages")
 
-    for i, url in enumerate(subject_urls, start=1):
-        time.sleep(random.uniform(0.25, 0.75))  # polite delay
-        resp = _request_with_retries(session, url)
-        html = resp.text
+    # map() yields in input order, so the manifest stays sorted by URL
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        records = pool.map(partial(_fetch_subject, session, subjects_dir, previous), subject_urls)
+        for i, rec in enumerate(records, start=1):
+            manifest.append(rec)
 
-        slug = _subject_slug(url)
-        path = os.path.join(subjects_dir, f"{slug}.html")
-        _save_html(path, html)
-        manifest.append(DownloadRecord(url=url, path=path, kind="subject"))
+            if i % 25 == 0 or i == len(subject_urls):
+                print(f"[info] Downloaded {i}/{len(subject_urls)} subject pages")
 
-        if i % 25 == 0 or i == len(subject_urls):
-            print(f"[info] Downloaded {i}/{len(subject_urls)} subject pages")
-
-    # 3) Save manifest (helps you debug + prove what you downloaded)
-    manifest_path = os.path.join(out_dir, "manifest.json")
+    # 3) Save manifest (helps you debug + prove what you downloaded;
+    #    the ETag/Last-Modified values make the next run incremental)
     with open(manifest_path, "w", encoding="utf-8") as f:
-        json.dump([r.__dict__ for r in manifest], f, indent=2)
+        records_out = [asdict(r) for r in manifest]
+        if orjson is not None:
+            f.write(orjson.dumps(records_out, option=orjson.OPT_INDENT_2).decode("utf-8"))
+        else:
+            json.dump(records_out, f, indent=2)
 
     print(f"[done] index.html:    {index_path}")
     print(f"[done] subjects/:    {subjects_dir}")
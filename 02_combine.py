@@ -11,30 +11,54 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Deque, Iterator, List
 
-from bs4 import BeautifulSoup
+
+# opening <body ...> tag (attributes allowed)
+BODY_OPEN_RE = re.compile(r"<body\b[^>]*>", re.I)
+
+# subject files are read on a small thread pool (I/O-bound)
+MAX_WORKERS = 8
 
 
 def read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="replace")
 
 
+def read_texts(ex: ThreadPoolExecutor, files: List[Path]) -> Iterator[str]:
+    """
+    File contents in input order, with at most MAX_WORKERS reads in flight
+    (ex.map would submit them all at once and buffer every file).
+    """
+    pending: Deque[Future] = deque()
+    for path in files:
+        if len(pending) >= MAX_WORKERS:
+            yield pending.popleft().result()
+        pending.append(ex.submit(read_text, path))
+    while pending:
+        yield pending.popleft().result()
+
+
 def extract_body_inner_html(html: str) -> str:
     """
     If the file is a full HTML document, keep only the inner HTML of <body>
     to avoid nesting <html><head>... multiple times.
 
+    The catalog pages have exactly one <body>, so this is a plain slice
+    between the opening tag and the last </body> (no parse/re-serialize).
+
     If <body> is missing, fall back to the full HTML string.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    body = soup.body
-    if body is None:
+    m = BODY_OPEN_RE.search(html)
+    if not m:
         return html
 
-    # Join body children back into a string (keeps original tags)
-    return "".join(str(child) for child in body.contents)
+    end = html.lower().rfind("</body>")
+    return html[m.end():end] if end != -1 else html[m.end():]
 
 
 def main() -> None:
@@ -51,46 +75,55 @@ def main() -> None:
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    files = sorted(p for p in input_dir.glob("*.html") if p.is_file())
+    # scandir's DirEntry.is_file() reuses the readdir record (no extra stat)
+    with os.scandir(input_dir) as it:
+        files = sorted(
+            (Path(e.path) for e in it if e.name.endswith(".html") and e.is_file(follow_symlinks=False)),
+            key=lambda p: p.name,
+        )
     if not files:
         raise FileNotFoundError(f"No .html files found in: {input_dir}")
 
-    generated_at = datetime.now().isoformat(timespec="seconds")
-
-    # Build ONE valid HTML document that contains all subject bodies
-    parts: list[str] = []
-    parts.append("<!doctype html>")
-    parts.append("<html lang='en'>")
-    parts.append("<head>")
-    parts.append("<meta charset='utf-8'/>")
-    parts.append("<meta name='viewport' content='width=device-width, initial-scale=1'/>")
-    parts.append("<title>Northeastern Course Descriptions — Combined</title>")
-    parts.append("</head>")
-    parts.append("<body>")
-    parts.append(f"<!-- Combined from {len(files)} subject pages. Generated at {generated_at}. -->")
-    parts.append("<h1>Northeastern Course Descriptions — Combined</h1>")
-    parts.append("<p>This file concatenates subject pages from data/raw_ne/subjects/.</p>")
-    parts.append("<hr/>")
-
-    for i, path in enumerate(files, start=1):
-        raw = read_text(path)
-        body_html = extract_body_inner_html(raw)
-
-        # Wrap each subject page in a section for provenance
-        parts.append(
-            f"<section class='subject-page' data-source-file='{path.name}'>"
-            f"<!-- START {path.name} ({i}/{len(files)}) -->"
-        )
-        parts.append(f"<h2>Source: {path.name}</h2>")
-        parts.append(body_html)
-        parts.append(f"<!-- END {path.name} -->")
-        parts.append("</section>")
-        parts.append("<hr/>")
-
-    parts.append("</body>")
-    parts.append("</html>")
+    # Build ONE valid HTML document that contains all subject bodies,
+    # streamed straight to disk (one subject in memory at a time)
+    with output_path.open("w", encoding="utf-8", buffering=1 << 20) as out:
+        out.write("<!doctype html>\n")
+        out.write("<html lang='en'>\n")
+        out.write("<head>\n")
+        out.write("<meta charset='utf-8'/>\n")
+        out.write("<meta name='viewport' content='width=device-width, initial-scale=1'/>\n")
+        out.write("<title>Northeastern Course Descriptions — Combined</title>\n")
+        out.write("</head>\n")
+        out.write("<body>\n")
+        # no timestamp here: identical inputs must give identical bytes, or
+        # 03_parse's input-digest skip would never fire after a rerun of 02
+        out.write(f"<!-- Combined from {len(files)} subject pages. -->\n")
+        out.write("<h1>Northeastern Course Descriptions — Combined</h1>\n")
+        out.write("<p>This file concatenates subject pages from data/raw_ne/subjects/.</p>\n")
+        out.write("<hr/>\n")
+
+        # file contents come back in input order while the next few reads overlap
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            raws = read_texts(ex, files)
+
+            for i, (path, raw) in enumerate(zip(files, raws), start=1):
+                body_html = extract_body_inner_html(raw)
+
+                # Wrap each subject page in a section for provenance
+                out.write(
+                    f"<section class='subject-page' data-source-file='{path.name}'>"
+                    f"<!-- START {path.name} ({i}/{len(files)}) -->\n"
+                )
+                out.write(f"<h2>Source: {path.name}</h2>\n")
+                out.write(body_html)
+                out.write("\n")
+                out.write(f"<!-- END {path.name} -->\n")
+                out.write("</section>\n")
+                out.write("<hr/>\n")
+
+        out.write("</body>\n")
+        out.write("</html>")
 
-    output_path.write_text("\n".join(parts), encoding="utf-8")
     print(f"[done] Combined {len(files)} files into: {output_path}")
 
 
@@ -19,13 +19,23 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import json
+import os
 import re
-from dataclasses import asdict, dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Deque, Iterable, Iterator, Optional, Tuple
 
-from bs4 import BeautifulSoup, Tag
+from lxml import etree
+
+# orjson is optional; it is noticeably faster on the multi-MB record arrays
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # input from 02_combine.py
 COMBINED_HTML = Path("data/combined/ne_course_catalog_combined.html")
@@ -34,9 +44,10 @@ COMBINED_HTML = Path("data/combined/ne_course_catalog_combined.html")
 OUT_DIR = Path("data/parsed")
 OUT_JSON = OUT_DIR / "ne_courses.json"
 OUT_CSV = OUT_DIR / "ne_courses.csv"
+OUT_HASH = OUT_DIR / "ne_courses.json.sha256"   # input digest of the last successful run
 
 
-@dataclass
+@dataclass(slots=True)
 class Course:
     subject_file: str            # e.g. "arch.html" (from data-source-file)
     course_code: str             # e.g. "ARCH 1110"
@@ -46,10 +57,34 @@ class Course:
     raw_title: str               # keep original for debugging/provenance
 
 
+# output column order (same as the Course fields)
+FIELDS = ("subject_file", "course_code", "title", "credits", "description", "raw_title")
+
+
+# XPath class tests mirror CSS ".name" (class is a space-separated token list)
+COURSEBLOCK_XP = etree.XPath(".//div[contains(concat(' ', normalize-space(@class), ' '), ' courseblock ')]")
+TITLE_XP = etree.XPath(".//*[contains(concat(' ', normalize-space(@class), ' '), ' courseblocktitle ')]")
+DESC_XP = etree.XPath(".//*[contains(concat(' ', normalize-space(@class), ' '), ' courseblockdesc ')]")
+
+# precompiled patterns for the per-course hot path
+WS_RE = re.compile(r"\s+")
+CREDIT_PAREN_RE = re.compile(r"\(([^()]*\d+[^()]*)\)\s*$")
+CREDIT_SUFFIX_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s*(SH|Hours|Hrs|Credits?)\s*$", re.I)
+CODE_SPACED_RE = re.compile(r"^([A-Z]{2,6})\s+(\d{3,5}[A-Z]?)\b[.\s-]*")
+CODE_COMPACT_RE = re.compile(r"^([A-Z]{2,6})(\d{3,5}[A-Z]?)\b[.\s-]*")
+# cheap necessary condition for either code form; rejects non-course headings
+COURSE_PREFIX_RE = re.compile(r"^[A-Z]{2,6}\s*\d{3,5}")
+
+
 # ---------------- helpers ----------------
 
 def clean_text(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return WS_RE.sub(" ", s).strip()
+
+
+def node_text(el: etree._Element) -> str:
+    """Text of an element, like BeautifulSoup's get_text(" ", strip=True)."""
+    return " ".join(t for t in (s.strip() for s in el.itertext()) if t)
 
 
 def split_title_line(title_line: str) -> Tuple[str, str, Optional[str]]:
@@ -67,23 +102,23 @@ def split_title_line(title_line: str) -> Tuple[str, str, Optional[str]]:
     credits = None
 
     # credits at end in parentheses
-    m = re.search(r"\(([^()]*\d+[^()]*)\)\s*$", t)
+    m = CREDIT_PAREN_RE.search(t)
     if m:
         credits = clean_text(m.group(1))
         t = clean_text(t[: m.start()])
 
     # credits at end without parentheses e.g. "4 SH"
     if credits is None:
-        m2 = re.search(r"\b(\d+(?:\.\d+)?)\s*(SH|Hours|Hrs|Credits?)\s*$", t, flags=re.I)
+        m2 = CREDIT_SUFFIX_RE.search(t)
         if m2:
             credits = clean_text(m2.group(0))
             t = clean_text(t[: m2.start()])
 
     # course code: "ARCH 1110" or "CS 2500"
-    m3 = re.match(r"^([A-Z]{2,6})\s+(\d{3,5}[A-Z]?)\b[.\s-]*", t)
+    m3 = CODE_SPACED_RE.match(t)
     if not m3:
         # sometimes compressed like "ARCH1110"
-        m4 = re.match(r"^([A-Z]{2,6})(\d{3,5}[A-Z]?)\b[.\s-]*", t)
+        m4 = CODE_COMPACT_RE.match(t)
         if m4:
             code = f"{m4.group(1)} {m4.group(2)}"
             title = clean_text(t[m4.end():])
@@ -95,39 +130,40 @@ def split_title_line(title_line: str) -> Tuple[str, str, Optional[str]]:
     return code, title, credits
 
 
-def find_course_blocks(section: Tag) -> list[Tag]:
+def find_course_blocks(section: etree._Element) -> list[etree._Element]:
     """
     NE catalog (Modern Campus) often uses div.courseblock wrappers.
     We try that first; if missing, fall back to .courseblocktitle nodes.
     """
-    blocks = section.select("div.courseblock")
+    blocks = COURSEBLOCK_XP(section)
     if blocks:
         return blocks
 
     # fallback: if no wrapper, use each title node's parent as a "block"
-    titles = section.select(".courseblocktitle")
+    titles = TITLE_XP(section)
     if titles:
-        out: list[Tag] = []
+        out: list[etree._Element] = []
         for t in titles:
-            out.append(t.parent if isinstance(t.parent, Tag) else t)
+            parent = t.getparent()
+            out.append(parent if parent is not None else t)
         return out
 
     return []
 
 
-def extract_title_and_desc(block: Tag) -> Tuple[str, str]:
+def extract_title_and_desc(block: etree._Element) -> Tuple[str, str]:
     """
     Extract a raw title line and a description from a course block.
     """
-    title_tag = block.select_one(".courseblocktitle")
-    raw_title = clean_text(title_tag.get_text(" ", strip=True)) if title_tag else ""
+    title_tags = TITLE_XP(block)
+    raw_title = clean_text(node_text(title_tags[0])) if title_tags else ""
 
-    desc_tag = block.select_one(".courseblockdesc")
-    desc = clean_text(desc_tag.get_text(" ", strip=True)) if desc_tag else ""
+    desc_tags = DESC_XP(block)
+    desc = clean_text(node_text(desc_tags[0])) if desc_tags else ""
 
     # fallback: if we have a title but no desc node, take remaining text
     if raw_title and not desc:
-        full = clean_text(block.get_text(" ", strip=True))
+        full = clean_text(node_text(block))
         if full.startswith(raw_title):
             desc = clean_text(full[len(raw_title):])
         else:
@@ -136,6 +172,90 @@ def extract_title_and_desc(block: Tag) -> Tuple[str, str]:
     return raw_title, desc
 
 
+def input_digest(path: Path) -> str:
+    """
+    sha256 of this stage's input plus this script's own source, so either a
+    new input or a code change invalidates the previous outputs.
+    """
+    h = hashlib.sha256(path.read_bytes())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
+
+
+def parse_section(item: tuple[str, str]) -> list[Course]:
+    """
+    Parse one (source_file, section_html) pair from iter_sections into courses.
+    Runs in a worker process, so it only takes/returns picklable values.
+    """
+    source_file, section_html = item
+    section = etree.HTML(section_html)
+    courses: list[Course] = []
+
+    for block in find_course_blocks(section):
+        raw_title, desc = extract_title_and_desc(block)
+        if not raw_title:
+            continue
+
+        # one match instead of the full split for blocks that can't be courses
+        if not COURSE_PREFIX_RE.match(raw_title):
+            continue
+
+        code, title, credits = split_title_line(raw_title)
+
+        # skip items that don't look like a course
+        if not code:
+            continue
+
+        courses.append(
+            Course(
+                subject_file=source_file,
+                course_code=code,
+                title=title,
+                credits=credits,
+                description=desc,
+                raw_title=raw_title,
+            )
+        )
+    return courses
+
+
+def iter_sections(path: Path) -> Iterator[tuple[str, str]]:
+    """
+    Stream the combined file and yield (source_file, section_html) for each
+    subject section as soon as it is closed, then free it.
+    created by 02_combine.py: <section class="subject-page" data-source-file="arch.html">
+    """
+    # Pass the path (not a str/bytes copy) so libxml2 reads the file
+    # incrementally itself; the whole document is never held in Python.
+    context = etree.iterparse(str(path), events=("end",), tag="section", html=True, encoding="utf-8")
+    for _, section in context:
+        if section.get("class") != "subject-page" or section.get("data-source-file") is None:
+            continue
+
+        yield section.get("data-source-file").strip(), etree.tostring(section, encoding="unicode")
+
+        # release the finished section and anything before it
+        section.clear()
+        while section.getprevious() is not None:
+            del section.getparent()[0]
+
+
+def parse_sections(ex: ProcessPoolExecutor, sections: Iterable[tuple[str, str]], window: int) -> Iterator[list[Course]]:
+    """
+    parse_section() over `sections` in the pool, in document order. At most
+    `window` sections are submitted at a time (ex.map would drain the whole
+    iter_sections generator up front), so section HTML is pulled from the
+    stream only as results are consumed.
+    """
+    pending: Deque[Future] = deque()
+    for item in sections:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(ex.submit(parse_section, item))
+    while pending:
+        yield pending.popleft().result()
+
+
 # ---------------- main ----------------
 
 def main() -> None:
@@ -147,65 +267,66 @@ def main() -> None:
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    html = COMBINED_HTML.read_text(encoding="utf-8", errors="replace")
-    soup = BeautifulSoup(html, "html.parser")
-
-    # created by 02_combine.py: <section class="subject-page" data-source-file="arch.html">
-    sections = soup.select("section.subject-page[data-source-file]")
-    if not sections:
+    # Skip the stage when its input (and this script) are unchanged since the
+    # last successful run; delete the .sha256 sidecar to force a re-run.
+    digest = input_digest(COMBINED_HTML)
+    if OUT_HASH.exists() and OUT_JSON.exists() and OUT_CSV.exists() and OUT_HASH.read_text(encoding="utf-8").strip() == digest:
+        print("[skip] inputs unchanged")
+        return
+    OUT_HASH.unlink(missing_ok=True)
+
+    n_courses = 0
+    n_sections = 0
+    preview: list[Course] = []
+
+    # Courses are written to JSON + CSV as they are parsed (no in-memory list)
+    with open(OUT_JSON, "w", encoding="utf-8") as jf, open(OUT_CSV, "w", newline="", encoding="utf-8") as cf:
+        writer = csv.writer(cf)
+        writer.writerow(FIELDS)
+        jf.write("[")
+
+        # Sections are independent, so they are parsed in worker processes,
+        # with only a couple of sections per worker in flight at a time;
+        # results come back in document order.
+        workers = os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            sections = iter_sections(COMBINED_HTML)
+            for courses in parse_sections(ex, sections, window=2 * workers):
+                n_sections += 1
+
+                for c in courses:
+                    out_row = (c.subject_file, c.course_code, c.title, c.credits, c.description, c.raw_title)
+                    jf.write(",\n" if n_courses else "\n")
+                    # one element of a json.dumps(list, indent=2) array, indented a level
+                    item = dict(zip(FIELDS, out_row))
+                    if orjson is not None:
+                        text = orjson.dumps(item, option=orjson.OPT_INDENT_2).decode("utf-8")
+                    else:
+                        text = json.dumps(item, indent=2)
+                    jf.write("  " + text.replace("\n", "\n  "))
+                    writer.writerow(out_row)
+
+                    n_courses += 1
+                    if len(preview) < 5:
+                        preview.append(c)
+
+        jf.write("\n]" if n_courses else "]")
+
+    if not n_sections:
         raise RuntimeError(
             "Could not find subject sections.\n"
             "This parser expects 02_combine.py to wrap each file in:\n"
             "<section class='subject-page' data-source-file='...'>"
         )
 
-    courses: list[Course] = []
-
-    for section in sections:
-        source_file = (section.get("data-source-file") or "").strip()
-        blocks = find_course_blocks(section)
-
-        for block in blocks:
-            raw_title, desc = extract_title_and_desc(block)
-            if not raw_title:
-                continue
-
-            code, title, credits = split_title_line(raw_title)
-
-            # skip items that don't look like a course
-            if not code:
-                continue
-
-            courses.append(
-                Course(
-                    subject_file=source_file,
-                    course_code=code,
-                    title=title,
-                    credits=credits,
-                    description=desc,
-                    raw_title=raw_title,
-                )
-            )
-
-    # write JSON
-    OUT_JSON.write_text(json.dumps([asdict(c) for c in courses], indent=2), encoding="utf-8")
-
-    # write CSV
-    with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=["subject_file", "course_code", "title", "credits", "description", "raw_title"],
-        )
-        writer.writeheader()
-        for c in courses:
-            writer.writerow(asdict(c))
+    OUT_HASH.write_text(digest + "\n", encoding="utf-8")
 
-    print(f"[done] Parsed {len(courses)} courses")
+    print(f"[done] Parsed {n_courses} courses")
     print(f"[done] JSON -> {OUT_JSON}")
     print(f"[done] CSV  -> {OUT_CSV}")
 
     # quick sanity preview
-    for c in courses[:5]:
+    for c in preview:
         print(f"  - {c.course_code}: {c.title} ({c.credits})")
 
 
@@ -11,20 +11,36 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import json
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 
+# orjson is optional; it is noticeably faster on the multi-MB record arrays
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 IN_JSON = Path("data/parsed/ne_courses.json")
 OUT_DIR = Path("data/clean")
 OUT_JSON = OUT_DIR / "ne_courses_clean.json"
 OUT_CSV = OUT_DIR / "ne_courses_clean.csv"
+OUT_HASH = OUT_DIR / "ne_courses_clean.json.sha256"   # input digest of the last successful run
+
+# precompiled patterns for the per-row cleaners
+WS_RE = re.compile(r"\s+")
+TAG_RE = re.compile(r"<[^>]+>")
+CODE_RE = re.compile(r"^([A-Z]{2,6})\s*[- ]?\s*(\d{3,5}[A-Z]?)$")
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+SPACE_BEFORE_PERIOD_RE = re.compile(r"\s+\.$")
 
 
-@dataclass
+@dataclass(slots=True)
 class CleanCourse:
     subject_file: str
     subject: str                 # e.g. "CS"
@@ -37,10 +53,24 @@ class CleanCourse:
     credits_max: Optional[float]
 
 
+# output column order (same as the CleanCourse fields)
+FIELDS = (
+    "subject_file",
+    "subject",
+    "number",
+    "course_code",
+    "title",
+    "description",
+    "credits_raw",
+    "credits_min",
+    "credits_max",
+)
+
+
 # ---------- basic cleaners ----------
 
 def clean_ws(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
+    return WS_RE.sub(" ", (s or "")).strip()
 
 
 def normalize_course_code(course_code: str) -> Tuple[str, str, str]:
@@ -52,7 +82,7 @@ def normalize_course_code(course_code: str) -> Tuple[str, str, str]:
     """
     cc = clean_ws(course_code).upper()
 
-    m = re.match(r"^([A-Z]{2,6})\s*[- ]?\s*(\d{3,5}[A-Z]?)$", cc)
+    m = CODE_RE.match(cc)
     if not m:
         return "", "", cc
 
@@ -62,6 +92,7 @@ def normalize_course_code(course_code: str) -> Tuple[str, str, str]:
     return subj, num, norm
 
 
+@lru_cache(maxsize=None)
 def parse_credits(credits_raw: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
     """
     Convert credits strings into numeric min/max.
@@ -71,6 +102,8 @@ def parse_credits(credits_raw: Optional[str]) -> Tuple[Optional[float], Optional
       "1-4 Hours" -> (1.0, 4.0)
       "0-1 Credits" -> (0.0, 1.0)
       None / "" -> (None, None)
+
+    Cached: the catalog only uses a few dozen distinct credit strings.
     """
     if not credits_raw:
         return None, None
@@ -79,7 +112,7 @@ def parse_credits(credits_raw: Optional[str]) -> Tuple[Optional[float], Optional
     s = s.replace("–", "-")  # normalize en-dash to hyphen
 
     # Pull all numbers (including decimals) in order
-    nums = re.findall(r"\d+(?:\.\d+)?", s)
+    nums = NUMBER_RE.findall(s)
     if not nums:
         return None, None
 
@@ -106,7 +139,7 @@ def drop_html_if_any(text: str) -> str:
     remove tags defensively.
     """
     t = text or ""
-    t = re.sub(r"<[^>]+>", " ", t)  # remove tags
+    t = TAG_RE.sub(" ", t)  # remove tags
     return clean_ws(t)
 
 
@@ -115,13 +148,20 @@ def canonical_title(title: str) -> str:
     Make titles consistent (remove trailing periods/spaces).
     """
     t = clean_ws(title)
-    t = re.sub(r"\s+\.$", ".", t)
+    t = SPACE_BEFORE_PERIOD_RE.sub(".", t)
     # remove a single trailing period if it's just punctuation noise
     if t.endswith("."):
         t = t[:-1].strip()
     return t
 
 
+def input_digest(path: Path) -> str:
+    """sha256 of the input file + this script (same scheme as 03_parse.py)."""
+    h = hashlib.sha256(path.read_bytes())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
+
+
 # ---------- main cleaning pipeline ----------
 
 def main() -> None:
@@ -133,40 +173,58 @@ def main() -> None:
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    data = json.loads(IN_JSON.read_text(encoding="utf-8"))
-
-    cleaned: list[CleanCourse] = []
+    # skip if input and script are unchanged since the last successful run
+    digest = input_digest(IN_JSON)
+    if OUT_HASH.exists() and OUT_JSON.exists() and OUT_CSV.exists() and OUT_HASH.read_text(encoding="utf-8").strip() == digest:
+        print("[skip] inputs unchanged")
+        return
+    OUT_HASH.unlink(missing_ok=True)
+
+    if orjson is not None:
+        data = orjson.loads(IN_JSON.read_bytes())
+    else:
+        data = json.loads(IN_JSON.read_text(encoding="utf-8"))
+
+    n_cleaned = 0
+    missing_credits = 0
+    ranged: list[CleanCourse] = []
     seen_keys: set[tuple] = set()
 
-    for row in data:
-        subject_file = clean_ws(row.get("subject_file", ""))
-        course_code_raw = clean_ws(row.get("course_code", ""))
-        title_raw = row.get("title", "")
-        desc_raw = row.get("description", "")
-        credits_raw = row.get("credits")
-
-        # Clean text fields
-        title = canonical_title(drop_html_if_any(str(title_raw)))
-        description = drop_html_if_any(str(desc_raw))
-
-        # Normalize course code
-        subject, number, course_code = normalize_course_code(course_code_raw)
-
-        # If we can't parse a real course code, skip (prevents breaking analysis)
-        if not subject or not number:
-            continue
-
-        # Parse credits range
-        cmin, cmax = parse_credits(credits_raw if credits_raw is None else str(credits_raw))
-
-        # Deduplicate (same course code + title)
-        key = (subject, number, title.lower())
-        if key in seen_keys:
-            continue
-        seen_keys.add(key)
-
-        cleaned.append(
-            CleanCourse(
+    # Clean courses are written to JSON + CSV as they are produced
+    with open(OUT_JSON, "w", encoding="utf-8") as jf, open(OUT_CSV, "w", newline="", encoding="utf-8") as cf:
+        writer = csv.writer(cf)
+        writer.writerow(FIELDS)
+        jf.write("[")
+
+        for row in data:
+            subject_file = clean_ws(row.get("subject_file", ""))
+            course_code_raw = clean_ws(row.get("course_code", ""))
+            title_raw = row.get("title", "")
+            desc_raw = row.get("description", "")
+            credits_raw = row.get("credits")
+
+            # Normalize course code
+            subject, number, course_code = normalize_course_code(course_code_raw)
+
+            # If we can't parse a real course code, skip (prevents breaking analysis)
+            if not subject or not number:
+                continue
+
+            # Deduplicate (same course code + title) before the remaining
+            # cleaning, so repeated rows cost only the title clean
+            title = canonical_title(drop_html_if_any(str(title_raw)))
+            key = (subject, number, title.lower())
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+
+            # Clean remaining text fields
+            description = drop_html_if_any(str(desc_raw))
+
+            # Parse credits range
+            cmin, cmax = parse_credits(credits_raw if credits_raw is None else str(credits_raw))
+
+            c = CleanCourse(
                 subject_file=subject_file,
                 subject=subject,
                 number=number,
@@ -177,46 +235,48 @@ def main() -> None:
                 credits_min=cmin,
                 credits_max=cmax,
             )
-        )
-
-    # Write clean JSON
-    OUT_JSON.write_text(
-        json.dumps([c.__dict__ for c in cleaned], indent=2),
-        encoding="utf-8",
-    )
-
-    # Write clean CSV
-    with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "subject_file",
-                "subject",
-                "number",
-                "course_code",
-                "title",
-                "description",
-                "credits_raw",
-                "credits_min",
-                "credits_max",
-            ],
-        )
-        writer.writeheader()
-        for c in cleaned:
-            writer.writerow(c.__dict__)
-
-    print(f"[done] Cleaned courses: {len(cleaned)}")
+            jf.write(",\n" if n_cleaned else "\n")
+            out_row = (
+                c.subject_file,
+                c.subject,
+                c.number,
+                c.course_code,
+                c.title,
+                c.description,
+                c.credits_raw,
+                c.credits_min,
+                c.credits_max,
+            )
+            # one element of a json.dumps(list, indent=2) array, indented a level
+            item = dict(zip(FIELDS, out_row))
+            if orjson is not None:
+                text = orjson.dumps(item, option=orjson.OPT_INDENT_2).decode("utf-8")
+            else:
+                text = json.dumps(item, indent=2)
+            jf.write("  " + text.replace("\n", "\n  "))
+            writer.writerow(out_row)
+            n_cleaned += 1
+
+            # running sanity-check counters
+            if c.credits_min is None:
+                missing_credits += 1
+            elif c.credits_max is not None and c.credits_min != c.credits_max and len(ranged) < 5:
+                ranged.append(c)
+
+        jf.write("\n]" if n_cleaned else "]")
+
+    OUT_HASH.write_text(digest + "\n", encoding="utf-8")
+
+    print(f"[done] Cleaned courses: {n_cleaned}")
     print(f"[done] JSON -> {OUT_JSON}")
     print(f"[done] CSV  -> {OUT_CSV}")
 
     # quick sanity checks
     # 1) how many have missing credits?
-    missing_credits = sum(1 for c in cleaned if c.credits_min is None)
     print(f"[info] Missing credits: {missing_credits}")
 
     # 2) show a few examples with ranges
-    ranged = [c for c in cleaned if c.credits_min is not None and c.credits_max is not None and c.credits_min != c.credits_max]
-    for ex in ranged[:5]:
+    for ex in ranged:
         print(f"  [range] {ex.course_code}: {ex.credits_raw} -> ({ex.credits_min}, {ex.credits_max})")
 
 
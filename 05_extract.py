@@ -17,9 +17,17 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import json
+import mmap
 from pathlib import Path
 
+# orjson is optional; it is noticeably faster on the multi-MB record arrays
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 IN_JSON = Path("data/clean/ne_courses_clean.json")
 OUT_DIR = Path("data/extract")
@@ -27,6 +35,14 @@ OUT_DIR = Path("data/extract")
 OUT_TXT = OUT_DIR / "course_titles.txt"
 OUT_JSON = OUT_DIR / "course_titles.json"
 OUT_CSV = OUT_DIR / "course_titles.csv"
+OUT_HASH = OUT_DIR / "course_titles.json.sha256"   # input digest of the last successful run
+
+
+def input_digest(path: Path) -> str:
+    """sha256 of the input file + this script (same scheme as 03_parse.py)."""
+    h = hashlib.sha256(path.read_bytes())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
 
 
 def main() -> None:
@@ -38,10 +54,26 @@ def main() -> None:
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    data = json.loads(IN_JSON.read_text(encoding="utf-8"))
+    # skip if input and script are unchanged since the last successful run
+    digest = input_digest(IN_JSON)
+    if OUT_HASH.exists() and OUT_TXT.exists() and OUT_JSON.exists() and OUT_CSV.exists() and OUT_HASH.read_text(encoding="utf-8").strip() == digest:
+        print("[skip] inputs unchanged")
+        return
+    OUT_HASH.unlink(missing_ok=True)
+
+    if orjson is not None and IN_JSON.stat().st_size == 0:
+        # an empty file can't be mapped; let orjson report it as invalid JSON
+        data = orjson.loads(IN_JSON.read_bytes())
+    elif orjson is not None:
+        # orjson parses the mapped bytes directly: no read copy, no str decode
+        with open(IN_JSON, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                data = orjson.loads(view)
+    else:
+        data = json.loads(IN_JSON.read_text(encoding="utf-8"))
 
     titles: list[str] = []
-    rows: list[dict] = []
+    rows: list[tuple[str, str, str]] = []
     seen: set[str] = set()
 
     for r in data:
@@ -62,26 +94,24 @@ def main() -> None:
         seen.add(combined)
 
         titles.append(combined)
-        rows.append(
-            {
-                "course_code": course_code,
-                "title": title,
-                "course_title": combined,
-            }
-        )
+        rows.append((course_code, title, combined))
 
     # Write TXT (one per line)
     OUT_TXT.write_text("\n".join(titles) + "\n", encoding="utf-8")
 
     # Write JSON (list of strings)
-    OUT_JSON.write_text(json.dumps(titles, indent=2), encoding="utf-8")
+    if orjson is not None:
+        OUT_JSON.write_bytes(orjson.dumps(titles, option=orjson.OPT_INDENT_2))
+    else:
+        OUT_JSON.write_text(json.dumps(titles, indent=2), encoding="utf-8")
 
     # Write CSV (structured)
     with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["course_code", "title", "course_title"])
-        w.writeheader()
-        for row in rows:
-            w.writerow(row)
+        w = csv.writer(f)
+        w.writerow(("course_code", "title", "course_title"))
+        w.writerows(rows)
+
+    OUT_HASH.write_text(digest + "\n", encoding="utf-8")
 
     print(f"[done] Extracted {len(titles)} unique course titles")
     print(f"[done] TXT  -> {OUT_TXT}")
@@ -11,11 +11,18 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import json
 import re
 from collections import Counter
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterator, List
+
+# orjson is optional; it is noticeably faster on the multi-MB record arrays
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 IN_TXT = Path("data/extract/course_titles.txt")
@@ -24,34 +31,38 @@ IN_JSON = Path("data/extract/course_titles.json")
 OUT_DIR = Path("data/frequency")
 OUT_CSV = OUT_DIR / "title_word_counts.csv"
 OUT_JSON = OUT_DIR / "title_word_counts.json"
+OUT_HASH = OUT_DIR / "title_word_counts.json.sha256"   # input digest of the last successful run
 
 # A practical stopword list (you can add/remove as you like)
-STOPWORDS = {
+STOPWORDS = frozenset({
     "a", "an", "and", "are", "as", "at", "be", "by", "for", "from",
     "in", "into", "is", "it", "of", "on", "or", "the", "to", "with",
     "without", "via", "than", "that", "this", "these", "those",
     "i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x",
     "introduction",  # optional: common but not very informative
-}
+})
 
 # words like "topics", "seminar", etc. are sometimes too generic; optional:
-OPTIONAL_GENERIC = {
+OPTIONAL_GENERIC = frozenset({
     "topics", "seminar", "special", "selected", "independent", "study",
     "practicum", "workshop", "lab", "project", "capstone",
     "elective", "research",
-}
+})
 # Toggle this if you want to remove generic words too
 REMOVE_GENERIC_WORDS = False
 
+# a run of letters/digits containing at least one letter (so "3d" is kept but
+# pure numbers like course codes never match)
+WORD_RE = re.compile(r"[a-z0-9]*[a-z][a-z0-9]*")
+
 
-def load_titles() -> List[str]:
+def titles_source() -> Path:
     """
-    Prefer JSON if present; otherwise read TXT (one per line).
+    Prefer JSON if present; otherwise TXT (one per line).
     """
-    if IN_JSON.exists():
-        return json.loads(IN_JSON.read_text(encoding="utf-8"))
-    if IN_TXT.exists():
-        return [line.strip() for line in IN_TXT.read_text(encoding="utf-8").splitlines() if line.strip()]
+    for path in (IN_JSON, IN_TXT):
+        if path.exists():
+            return path
     raise FileNotFoundError(
         "Could not find course titles input.\n"
         "Expected one of:\n"
@@ -61,33 +72,31 @@ def load_titles() -> List[str]:
     )
 
 
-def tokenize(title: str) -> List[str]:
+def load_titles(path: Path) -> List[str]:
+    if path.suffix == ".json":
+        if orjson is not None:
+            return orjson.loads(path.read_bytes())
+        return json.loads(path.read_text(encoding="utf-8"))
+    return [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def tokenize(title: str) -> Iterator[str]:
     """
     Convert a title string like:
       'AACE 6000 Arts and Culture Organizational Leadership'
     into meaningful tokens:
       ['arts', 'culture', 'organizational', 'leadership']
 
-    Steps:
+    Steps (single pass over the lowercased title):
     - lowercase
-    - replace punctuation with spaces
-    - split on whitespace
+    - match letter/number runs; punctuation like ":" "," "/" "(" ")" separates
+      words and pure numbers (e.g. "6000", "1990") never match
     - remove stopwords
-    - remove pure numbers (course numbers)
-    """
-    s = title.lower()
-
-    # Replace anything not a letter/number with a space.
-    # Keeps letters and digits; drops punctuation like ":" "," "/" "(" ")"
-    s = re.sub(r"[^a-z0-9]+", " ", s)
 
-    tokens = [t for t in s.split() if t]
-
-    out: List[str] = []
-    for t in tokens:
-        # drop pure numbers (e.g., "6000", "1990")
-        if t.isdigit():
-            continue
+    Tokens are yielded one at a time so callers can stream them into a Counter.
+    """
+    for m in WORD_RE.finditer(title.lower()):
+        t = m.group()
 
         # drop stopwords
         if t in STOPWORDS:
@@ -97,48 +106,45 @@ def tokenize(title: str) -> List[str]:
         if REMOVE_GENERIC_WORDS and t in OPTIONAL_GENERIC:
             continue
 
-        out.append(t)
-
-    return out
-
+        yield t
 
-def map_phase(titles: Iterable[str]) -> List[tuple[str, int]]:
-    """
-    Map step: produce (word, 1) pairs for every token in every title.
-    """
-    pairs: List[tuple[str, int]] = []
-    for title in titles:
-        for word in tokenize(title):
-            pairs.append((word, 1))
-    return pairs
 
-
-def reduce_phase(pairs: Iterable[tuple[str, int]]) -> Counter:
-    """
-    Reduce step: aggregate counts by summing values for each key (word).
-    """
-    c = Counter()
-    for word, n in pairs:
-        c[word] += n
-    return c
+def input_digest(path: Path) -> str:
+    """sha256 of the input file + this script (same scheme as 03_parse.py)."""
+    h = hashlib.sha256(path.read_bytes())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
 
 
 def main() -> None:
-    titles = load_titles()
+    source = titles_source()
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Map-Reduce
-    pairs = map_phase(titles)
-    counts = reduce_phase(pairs)
+    # skip if input and script are unchanged since the last successful run,
+    # before paying for the load
+    digest = input_digest(source)
+    if OUT_HASH.exists() and OUT_CSV.exists() and OUT_JSON.exists() and OUT_HASH.read_text(encoding="utf-8").strip() == digest:
+        print("[skip] inputs unchanged")
+        return
+    OUT_HASH.unlink(missing_ok=True)
+
+    titles = load_titles(source)
+
+    # Map-Reduce, fused: Counter.update consumes each title's tokens as they
+    # are produced instead of materializing (word, 1) pairs first
+    counts: Counter = Counter()
+    for title in titles:
+        counts.update(tokenize(title))
 
     # Sort by frequency desc, then word asc
     items = sorted(counts.items(), key=lambda x: (-x[1], x[0]))
 
     # Write JSON (list of objects)
-    OUT_JSON.write_text(
-        json.dumps([{"word": w, "count": n} for w, n in items], indent=2),
-        encoding="utf-8",
-    )
+    records = [{"word": w, "count": n} for w, n in items]
+    if orjson is not None:
+        OUT_JSON.write_bytes(orjson.dumps(records, option=orjson.OPT_INDENT_2))
+    else:
+        OUT_JSON.write_text(json.dumps(records, indent=2), encoding="utf-8")
 
     # Write CSV
     with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
@@ -147,6 +153,8 @@ def main() -> None:
         for word, n in items:
             w.writerow({"word": word, "count": n})
 
+    OUT_HASH.write_text(digest + "\n", encoding="utf-8")
+
     print(f"[done] Counted words from {len(titles)} titles")
     print(f"[done] CSV  -> {OUT_CSV}")
     print(f"[done] JSON -> {OUT_JSON}")
@@ -20,15 +20,123 @@
 # -----------------------------------------------
 from __future__ import annotations
 
+import argparse
 import json
+import mmap
+import sys
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+# orjson is optional; it serializes the full export straight to bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson is optional; with it the input is parsed one record at a time
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 
 IN_JSON = Path("data/clean/ne_courses_clean.json")
 OUT_DIR = Path("data/final")
 OUT_JSON = OUT_DIR / "ne_catalog_dataset.json"
+# streamable variant: one record per line + the small docs object on its own
+OUT_JSONL = OUT_DIR / "ne_catalog_dataset.jsonl"
+OUT_SCHEMA = OUT_DIR / "ne_catalog_dataset.schema.json"
+
+# "format_version" of the main export: 2.0 has only "schema_ref" (schema and
+# assumptions live in OUT_SCHEMA); 1.1 is the 1.0 layout, still inlining
+# them, plus "schema_ref" (--verbose-schema)
+FORMAT_VERSION = "2.0"
+FORMAT_VERSION_INLINE_SCHEMA = "1.1"
+
+
+# Dataset documentation. It is written once per run to OUT_SCHEMA, which the
+# main export references via "schema_ref" (inlined only with --verbose-schema)
+SCHEMA_FIELDS: List[Dict[str, Any]] = [
+    {
+        "name": "subject_file",
+        "type": "string",
+        "description": "Source subject page filename (from acquisition/combination step).",
+        "example": "arch.html",
+    },
+    {
+        "name": "subject",
+        "type": "string",
+        "description": "Course subject/department code.",
+        "example": "CS",
+    },
+    {
+        "name": "number",
+        "type": "string",
+        "description": "Course number (may include suffix letters).",
+        "example": "2500",
+    },
+    {
+        "name": "course_code",
+        "type": "string",
+        "description": "Normalized subject + number, used as a primary identifier.",
+        "example": "CS 2500",
+    },
+    {
+        "name": "title",
+        "type": "string",
+        "description": "Course title (cleaned).",
+        "example": "Fundamentals of Computer Science",
+    },
+    {
+        "name": "description",
+        "type": "string",
+        "description": "Course description text (cleaned, whitespace-normalized).",
+        "example": "Introduces programming and problem solving ...",
+    },
+    {
+        "name": "credits_raw",
+        "type": "string|null",
+        "description": "Original credits string before numeric normalization.",
+        "example": "1-4 Hours",
+    },
+    {
+        "name": "credits_min",
+        "type": "number",
+        "description": "Minimum credits if a range; otherwise equals credits_max.",
+        "example": 1.0,
+    },
+    {
+        "name": "credits_max",
+        "type": "number",
+        "description": "Maximum credits if a range; otherwise equals credits_min.",
+        "example": 4.0,
+    },
+]
+
+ASSUMPTIONS: List[str] = [
+    "Catalog pages were downloaded from Northeastern's public course descriptions site and consolidated.",
+    "HTML was parsed using DOM structure (course blocks) and converted to structured records.",
+    "Whitespace was normalized and any stray HTML tags were defensively removed.",
+    "Credits were normalized into numeric credits_min/credits_max; ranges like '1-4 Hours' become (1.0, 4.0).",
+    "Records missing a course_code, title, or numeric credits were excluded from the final export.",
+    "The exported file is sorted by (subject, number, title) for readability; this does not change the data content.",
+]
+
+
+@dataclass(slots=True)
+class CatalogRecord:
+    subject_file: str
+    subject: str
+    number: str
+    course_code: str
+    title: str
+    description: str
+    credits_raw: Optional[str]
+    credits_min: Optional[float]
+    credits_max: Optional[float]
 
 
 def iso_now() -> str:
@@ -44,14 +152,20 @@ def to_float_or_none(x: Any) -> Optional[float]:
         return None
 
 
-def normalize_record(r: Dict[str, Any]) -> Dict[str, Any]:
+def normalize_record(r: Dict[str, Any]) -> CatalogRecord:
     """
     Enforce consistent types + keys.
     """
-    subject_file = str(r.get("subject_file", "")).strip()
-    subject = str(r.get("subject", "")).strip().upper()
+    # few hundred distinct values across all records: share one str object each
+    subject_file = sys.intern(str(r.get("subject_file", "")).strip())
+    subject = sys.intern(str(r.get("subject", "")).strip().upper())
     number = str(r.get("number", "")).strip().upper()
-    course_code = str(r.get("course_code", "")).strip().upper()
+    # 04_clean.py builds course_code as "SUBJECT NUMBER"; rebuild it from the
+    # normalized parts and only fall back to the raw value when one is missing
+    if subject and number:
+        course_code = f"{subject} {number}"
+    else:
+        course_code = str(r.get("course_code", "")).strip().upper()
 
     title = str(r.get("title", "")).strip()
     description = str(r.get("description", "")).strip()
@@ -62,20 +176,71 @@ def normalize_record(r: Dict[str, Any]) -> Dict[str, Any]:
     credits_min = to_float_or_none(r.get("credits_min"))
     credits_max = to_float_or_none(r.get("credits_max"))
 
-    return {
-        "subject_file": subject_file,
-        "subject": subject,
-        "number": number,
-        "course_code": course_code,
-        "title": title,
-        "description": description,
-        "credits_raw": credits_raw,
-        "credits_min": credits_min,
-        "credits_max": credits_max,
-    }
+    return CatalogRecord(
+        subject_file=subject_file,
+        subject=subject,
+        number=number,
+        course_code=course_code,
+        title=title,
+        description=description,
+        credits_raw=credits_raw,
+        credits_min=credits_min,
+        credits_max=credits_max,
+    )
+
+
+def iter_raw_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the cleaned input records one by one. With ijson installed the
+    file is stream-parsed (only one record in memory); otherwise it is
+    loaded whole with orjson (from a memory map) or json.
+    """
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+        return
+
+    if orjson is not None:
+        # orjson parses the mapped bytes directly: no read copy, no str decode
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                data = orjson.loads(view)
+        yield from data
+    else:
+        yield from json.loads(path.read_text(encoding="utf-8"))
+
 
+def write_jsonl(path: Path, records: List[CatalogRecord]) -> None:
+    """
+    Write one compact JSON object per line so consumers can stream records
+    with constant memory.
+    """
+    with open(path, "wb") as f:
+        for rec in records:
+            if orjson is not None:
+                f.write(orjson.dumps(rec))
+            else:
+                f.write(json.dumps(asdict(rec), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            f.write(b"\n")
+
+
+def write_json(path: Path, obj: Any) -> None:
+    """
+    Serialize obj (indent=2) straight into a buffered file handle instead of
+    building the whole document as one str first.
+    """
+    # orjson serializes dataclass records natively (fields in declaration order)
+    if orjson is not None:
+        with open(path, "wb", buffering=1 << 20) as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        # json.dump writes the encoder's chunks as they are produced;
+        # stdlib json can't encode dataclasses itself, so asdict them on demand
+        with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False, default=asdict)
 
-def main() -> None:
+
+def main(verbose_schema: bool = False) -> None:
     if not IN_JSON.exists():
         raise FileNotFoundError(
             f"Missing cleaned dataset: {IN_JSON}\n"
@@ -84,116 +249,76 @@ def main() -> None:
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    raw_data: List[Dict[str, Any]] = json.loads(IN_JSON.read_text(encoding="utf-8"))
-
-    # Normalize/validate records
-    records: List[Dict[str, Any]] = []
-    for r in raw_data:
+    # Normalize/validate records as they are read
+    records: List[CatalogRecord] = []
+    for r in iter_raw_records(IN_JSON):
         rec = normalize_record(r)
 
         # Minimal validity checks to ensure the exported dataset is usable
-        if not rec["course_code"] or not rec["title"]:
+        if not rec.course_code or not rec.title:
             continue
-        if rec["credits_min"] is None or rec["credits_max"] is None:
+        if rec.credits_min is None or rec.credits_max is None:
             continue
 
         records.append(rec)
 
-    # Sort for nicer downstream browsing
-    def sort_key(x: Dict[str, Any]) -> tuple:
-        # Number can be like "1341A" so keep lexicographic fallback
-        return (x["subject"], x["number"], x["title"].lower())
-
-    records.sort(key=sort_key)
+    # Sort for nicer downstream browsing. Keys are built once in a single
+    # comprehension (decorate-sort-undecorate) rather than via a Python
+    # key function; number can be like "1341A" so keep lexicographic fallback
+    decorated = [((x.subject, x.number, x.title.lower()), x) for x in records]
+    decorated.sort(key=itemgetter(0))
+    records = [x for _, x in decorated]
 
     # Build schema documentation
     schema = {
         "dataset_name": "Northeastern University Course Catalog (Course Descriptions)",
         "record_count": len(records),
-        "fields": [
-            {
-                "name": "subject_file",
-                "type": "string",
-                "description": "Source subject page filename (from acquisition/combination step).",
-                "example": "arch.html",
-            },
-            {
-                "name": "subject",
-                "type": "string",
-                "description": "Course subject/department code.",
-                "example": "CS",
-            },
-            {
-                "name": "number",
-                "type": "string",
-                "description": "Course number (may include suffix letters).",
-                "example": "2500",
-            },
-            {
-                "name": "course_code",
-                "type": "string",
-                "description": "Normalized subject + number, used as a primary identifier.",
-                "example": "CS 2500",
-            },
-            {
-                "name": "title",
-                "type": "string",
-                "description": "Course title (cleaned).",
-                "example": "Fundamentals of Computer Science",
-            },
-            {
-                "name": "description",
-                "type": "string",
-                "description": "Course description text (cleaned, whitespace-normalized).",
-                "example": "Introduces programming and problem solving ...",
-            },
-            {
-                "name": "credits_raw",
-                "type": "string|null",
-                "description": "Original credits string before numeric normalization.",
-                "example": "1-4 Hours",
-            },
-            {
-                "name": "credits_min",
-                "type": "number",
-                "description": "Minimum credits if a range; otherwise equals credits_max.",
-                "example": 1.0,
-            },
-            {
-                "name": "credits_max",
-                "type": "number",
-                "description": "Maximum credits if a range; otherwise equals credits_min.",
-                "example": 4.0,
-            },
-        ],
+        "fields": SCHEMA_FIELDS,
     }
 
-    assumptions = [
-        "Catalog pages were downloaded from Northeastern's public course descriptions site and consolidated.",
-        "HTML was parsed using DOM structure (course blocks) and converted to structured records.",
-        "Whitespace was normalized and any stray HTML tags were defensively removed.",
-        "Credits were normalized into numeric credits_min/credits_max; ranges like '1-4 Hours' become (1.0, 4.0).",
-        "Records missing a course_code, title, or numeric credits were excluded from the final export.",
-        "The exported file is sorted by (subject, number, title) for readability; this does not change the data content.",
-    ]
+    generated_at = iso_now()
 
-    export_obj = {
+    # The records file only points at the docs sidecar (same folder) unless
+    # asked to inline them, so consumers reach "records" without the schema
+    export_obj: Dict[str, Any] = {
         "metadata": {
-            "generated_at_utc": iso_now(),
+            "generated_at_utc": generated_at,
             "input_file": str(IN_JSON),
             "output_file": str(OUT_JSON),
-            "format_version": "1.0",
+            "format_version": FORMAT_VERSION_INLINE_SCHEMA if verbose_schema else FORMAT_VERSION,
         },
-        "schema": schema,
-        "assumptions": assumptions,
-        "records": records,
+        "schema_ref": OUT_SCHEMA.name,
     }
+    if verbose_schema:
+        export_obj["schema"] = schema
+        export_obj["assumptions"] = ASSUMPTIONS
+    export_obj["records"] = records
 
-    OUT_JSON.write_text(json.dumps(export_obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    # Same content split for streaming: records as JSON Lines, docs separately
+    schema_obj = {
+        "metadata": {
+            "generated_at_utc": generated_at,
+            "input_file": str(IN_JSON),
+            "records_file": str(OUT_JSONL),
+            "format_version": FORMAT_VERSION,
+        },
+        "schema": schema,
+        "assumptions": ASSUMPTIONS,
+    }
+    write_jsonl(OUT_JSONL, records)
+    write_json(OUT_SCHEMA, schema_obj)
+    write_json(OUT_JSON, export_obj)
 
     print(f"[done] Exported final dataset with {len(records)} records")
     print(f"[done] -> {OUT_JSON}")
+    print(f"[done] -> {OUT_JSONL} (+ {OUT_SCHEMA.name})")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="Export the cleaned catalog as the final dataset.")
+    ap.add_argument(
+        "--verbose-schema",
+        action="store_true",
+        help="Also inline the schema and assumptions in the main JSON (normally only referenced).",
+    )
+    main(verbose_schema=ap.parse_args().verbose_schema)
\ No newline at end of file
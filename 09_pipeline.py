@@ -13,21 +13,28 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import subprocess
 import sys
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Tuple
-
-
-STEPS: List[Tuple[str, str]] = [
-    ("01_pull", "01_pull.py"),
-    ("02_combine", "02_combine.py"),
-    ("03_parse", "03_parse.py"),
-    ("04_clean", "04_clean.py"),
-    ("05_extract", "05_extract.py"),
-    ("06_frequency", "06_frequency.py"),
-    ("07_visualization", "07_visualization.py"),
-    ("08_export", "08_export.py"),
+from typing import Dict, List, Set, Tuple
+
+
+# (key, script, inputs, outputs); inputs/outputs are the files/folders each
+# step reads and writes, used to work out which steps can run side by side
+Step = Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]
+
+STEPS: List[Step] = [
+    ("01_pull", "01_pull.py", (), ("data/raw_ne/subjects",)),
+    ("02_combine", "02_combine.py", ("data/raw_ne/subjects",), ("data/combined/ne_course_catalog_combined.html",)),
+    ("03_parse", "03_parse.py", ("data/combined/ne_course_catalog_combined.html",), ("data/parsed/ne_courses.json",)),
+    ("04_clean", "04_clean.py", ("data/parsed/ne_courses.json",), ("data/clean/ne_courses_clean.json",)),
+    ("05_extract", "05_extract.py", ("data/clean/ne_courses_clean.json",), ("data/extract/course_titles.json",)),
+    ("06_frequency", "06_frequency.py", ("data/extract/course_titles.json",), ("data/frequency/title_word_counts.json",)),
+    ("07_visualization", "07_visualization.py", ("data/frequency/title_word_counts.json",), ("data/viz/word_frequency_top50.html",)),
+    ("08_export", "08_export.py", ("data/clean/ne_courses_clean.json",), ("data/final/ne_catalog_dataset.json",)),
 ]
 
 
@@ -54,8 +61,32 @@ def run_step(script_path: Path) -> None:
     print(f"========== DONE: {script_path.name} ==========")
 
 
-def slice_steps(start_at: str | None, end_at: str | None) -> List[Tuple[str, str]]:
-    keys = [k for k, _ in STEPS]
+def run_step_in_process(script_path: Path) -> None:
+    """
+    Import the script as a module and call its main() in this interpreter,
+    so interpreter startup and heavy library imports are paid once.
+    """
+    if not script_path.exists():
+        raise FileNotFoundError(f"Missing script: {script_path}")
+
+    print(f"\n========== RUN: {script_path.name} ==========")
+    print(f"Module: {script_path.stem}.main()")
+
+    try:
+        importlib.import_module(script_path.stem).main()
+    except SystemExit as e:
+        # a step calling sys.exit(0)/sys.exit() is still a success
+        if e.code not in (None, 0):
+            raise RuntimeError(f"Step failed: {script_path.name} (exit code {e.code})") from e
+    except Exception as e:
+        traceback.print_exc()
+        raise RuntimeError(f"Step failed: {script_path.name} ({type(e).__name__}: {e})") from e
+
+    print(f"========== DONE: {script_path.name} ==========")
+
+
+def slice_steps(start_at: str | None, end_at: str | None) -> List[Step]:
+    keys = [step[0] for step in STEPS]
 
     if start_at is None:
         start_idx = 0
@@ -77,6 +108,59 @@ def slice_steps(start_at: str | None, end_at: str | None) -> List[Tuple[str, str
     return STEPS[start_idx : end_idx + 1]
 
 
+def step_dependencies(steps: List[Step]) -> Dict[str, Set[str]]:
+    """
+    For each step, the keys of the steps in this run that produce its inputs.
+    Inputs made by steps outside the selected slice are assumed to exist
+    already (the step itself reports them if they don't).
+    """
+    producers: Dict[str, str] = {}
+    for key, _, _, outputs in steps:
+        for out in outputs:
+            producers[out] = key
+    return {key: {producers[i] for i in inputs if i in producers} for key, _, inputs, _ in steps}
+
+
+def run_concurrently(
+    steps: List[Step], deps: Dict[str, Set[str]], jobs: int, project_root: Path
+) -> Tuple[Step, Exception] | None:
+    """
+    Run steps in subprocesses, up to `jobs` at a time, launching each once
+    every step producing its inputs has finished (e.g. 08_export runs
+    alongside 05 -> 07, which only share 04's output). Returns the first
+    failure, if any.
+    """
+    pending = list(steps)
+    done: Set[str] = set()
+    running: Dict[Future, Step] = {}
+    failure: Tuple[Step, Exception] | None = None
+
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        while pending or running:
+            if failure is None:
+                for step in [s for s in pending if deps[s[0]] <= done]:
+                    if len(running) >= jobs:
+                        break
+                    pending.remove(step)
+                    running[ex.submit(run_step, project_root / step[1])] = step
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                step = running.pop(fut)
+                try:
+                    fut.result()
+                    done.add(step[0])
+                except Exception as e:
+                    # let steps already running finish, but start no new ones
+                    if failure is None:
+                        failure = (step, e)
+
+    return failure
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Run the full catalog data pipeline (01 -> 08).")
     ap.add_argument(
@@ -89,30 +173,60 @@ def main() -> None:
         default=None,
         help="End step key (e.g., 06_frequency). Useful for partial runs.",
     )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Max steps to run at once when their inputs allow it (default 1 = strictly sequential; "
+        "with more, every step runs in its own subprocess).",
+    )
+    ap.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Run each step in its own Python process (slower, but fully isolated).",
+    )
     args = ap.parse_args()
 
     project_root = Path(".").resolve()
 
+    # Step scripts are imported by module name (e.g. "03_parse") from here
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
     # Choose subset if requested
     steps_to_run = slice_steps(args.start_at, args.end_at)
 
     print("Pipeline steps:")
-    for k, f in steps_to_run:
+    for k, f, _, _ in steps_to_run:
         print(f"  - {k}: {f}")
 
-    # Run sequentially
-    for key, filename in steps_to_run:
-        script_path = project_root / filename
-        try:
-            run_step(script_path)
-        except Exception as e:
-            print("\n!!!!!!!! PIPELINE FAILED !!!!!!!!")
-            print(f"Step: {key} ({filename})")
-            print(f"Error: {e}")
-            print("Tips:")
-            print(f"  - Run the failing step alone: python {filename}")
-            print("  - Check that prior outputs exist (dependency files).")
-            sys.exit(1)
+    jobs = max(1, args.jobs)
+    failure: Tuple[Step, Exception] | None = None
+
+    if jobs == 1:
+        # Plain sequential run on the main thread, so Ctrl-C stops the
+        # current step and 03's process pool forks a single-threaded process
+        run = run_step if args.subprocess else run_step_in_process
+        for step in steps_to_run:
+            try:
+                run(project_root / step[1])
+            except Exception as e:
+                failure = (step, e)
+                break
+    else:
+        # Concurrent steps always get their own process: in-process steps
+        # would share stdout and fork 03's process pool from a thread
+        failure = run_concurrently(steps_to_run, step_dependencies(steps_to_run), jobs, project_root)
+
+    if failure is not None:
+        (key, filename, _, _), e = failure
+        print("\n!!!!!!!! PIPELINE FAILED !!!!!!!!")
+        print(f"Step: {key} ({filename})")
+        print(f"Error: {e}")
+        print("Tips:")
+        print(f"  - Run the failing step alone: python {filename}")
+        print("  - Check that prior outputs exist (dependency files).")
+        sys.exit(1)
 
     print("\n✅ Pipeline completed successfully!")
 
@@ -12,17 +12,23 @@
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
 import os
 import re
 import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Tuple
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import pdfplumber
 
@@ -34,16 +40,41 @@ except Exception:
     pytesseract = None
     convert_from_path = None
 
+# Faster regex engine for the course-header scan (optional)
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 
 INDEX_URL = "https://onexi.org/catalog/pdf/index.html"
 OUT_JSON = Path("10_mit_1996.json")
 
 RAW_DIR = Path("data/mit1996/raw_pdfs")
 TEXT_DIR = Path("data/mit1996/page_text")
+# Raw OCR output per page, keyed by PDF content hash + page number, so
+# re-runs (e.g. while tuning the parser) never OCR the same page twice.
+OCR_CACHE_DIR = Path("data/mit1996/ocr_cache")
+
+# the missing PDFs are downloaded concurrently
+DOWNLOAD_WORKERS = 8
 
 # If a page has fewer than this many non-whitespace chars using pdfplumber,
 # assume it is scanned-only and needs OCR.
 MIN_TEXT_CHARS_BEFORE_OCR = 200
+# Pages with fewer char objects than this can't reach the threshold above,
+# so pdfplumber's text extraction is skipped for them (straight to OCR).
+MIN_CHAR_OBJECTS = 20
+
+# OCR is CPU-bound (poppler rasterize + tesseract), so scanned pages are
+# OCR'd in parallel worker processes. Lower OCR_DPI (e.g. 200) trades some
+# accuracy for speed.
+OCR_WORKERS = os.cpu_count() or 1
+OCR_DPI = 250
+# Consecutive scanned pages are rasterized together (one poppler call per
+# run); runs are capped so work still spreads across workers and the page
+# images of one run stay small in memory.
+OCR_MAX_RUN_PAGES = 16
 
 
 @dataclass
@@ -60,12 +91,30 @@ class MITCourse1996:
 # Download PDFs
 # ------------------------
 
-def fetch_index_pdf_urls() -> List[str]:
+def make_session() -> requests.Session:
+    """
+    One keep-alive session (single host) for the index and all PDF
+    downloads. Created in main(), so importing this module (OCR workers,
+    09_pipeline.py) opens no connection pool.
+    """
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=DOWNLOAD_WORKERS,
+            pool_maxsize=DOWNLOAD_WORKERS,
+            max_retries=Retry(total=3, backoff_factor=0.5),
+        ),
+    )
+    return session
+
+
+def fetch_index_pdf_urls(session: requests.Session) -> List[str]:
     """
     Parse the index page and find the PDF links for Part 01..08.
     The index page lists 'Part 01' ... 'Part 08'.
     """
-    r = requests.get(INDEX_URL, timeout=30)
+    r = session.get(INDEX_URL, timeout=30)
     r.raise_for_status()
     soup = BeautifulSoup(r.text, "html.parser")
 
@@ -95,14 +144,36 @@ def fetch_index_pdf_urls() -> List[str]:
     return out
 
 
-def download_file(url: str, out_path: Path) -> None:
+def download_file(session: requests.Session, url: str, out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with requests.get(url, stream=True, timeout=60) as r:
+    # download to a side file so an interrupted transfer never looks cached
+    part_path = out_path.with_name(out_path.name + ".part")
+    with session.get(url, stream=True, timeout=60) as r:
         r.raise_for_status()
-        with open(out_path, "wb") as f:
+        with open(part_path, "wb") as f:
             for chunk in r.iter_content(chunk_size=1024 * 1024):
                 if chunk:
                     f.write(chunk)
+    os.replace(part_path, out_path)
+
+
+def download_missing_pdfs(session: requests.Session, pdf_urls: List[str]) -> None:
+    """
+    Download every PDF not already in RAW_DIR, in parallel over `session`.
+    """
+    missing = [u for u in pdf_urls if not (RAW_DIR / u.split("/")[-1]).exists()]
+    for url in pdf_urls:
+        if url not in missing:
+            print(f"[info] Using cached PDF: {RAW_DIR / url.split('/')[-1]}")
+    if not missing:
+        return
+
+    def fetch(url: str) -> None:
+        print(f"[info] Downloading: {url}")
+        download_file(session, url, RAW_DIR / url.split("/")[-1])
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as ex:
+        list(ex.map(fetch, missing))
 
 
 # ------------------------
@@ -116,17 +187,26 @@ def extract_text_pdfplumber(pdf_path: Path) -> List[str]:
     pages: List[str] = []
     with pdfplumber.open(str(pdf_path)) as pdf:
         for page in pdf.pages:
+            # pure scans have (almost) no char objects; counting them is far
+            # cheaper than running extract_text's line/word assembly
+            if len(page.chars) < MIN_CHAR_OBJECTS:
+                pages.append("")
+                continue
             txt = page.extract_text() or ""
             pages.append(txt)
     return pages
 
 
-def ocr_pdf_page(pdf_path: Path, page_index_zero_based: int) -> str:
+def ocr_pdf_pages(pdf_path: Path, first_index: int, last_index: int) -> List[str]:
     """
-    OCR one page of a PDF using pdf2image + pytesseract.
+    OCR a contiguous range of PDF pages using pdf2image + pytesseract.
     Requires poppler + tesseract installed.
 
-    page_index_zero_based: 0 for first page, etc.
+    The whole range is rasterized by a single poppler call (one process
+    start and one PDF parse) and then each image is OCR'd.
+
+    first_index/last_index: zero-based, inclusive (0 for first page, etc.)
+    Returns one text per page in the range.
     """
     if pytesseract is None or convert_from_path is None:
         raise RuntimeError(
@@ -134,18 +214,19 @@ def ocr_pdf_page(pdf_path: Path, page_index_zero_based: int) -> str:
             "and system packages: tesseract-ocr, poppler-utils."
         )
 
-    # convert a single page to an image
     images = convert_from_path(
         str(pdf_path),
-        first_page=page_index_zero_based + 1,
-        last_page=page_index_zero_based + 1,
-        dpi=250,
+        first_page=first_index + 1,
+        last_page=last_index + 1,
+        dpi=OCR_DPI,
     )
-    if not images:
-        return ""
-    img = images[0]
-    text = pytesseract.image_to_string(img)
-    return text or ""
+    return [pytesseract.image_to_string(img) or "" for img in images]
+
+
+# compiled once; these run for every page
+HYPHEN_BREAK_RE = re.compile(r"([A-Za-z])-\n([A-Za-z])")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+WS_RE = re.compile(r"\s+")
 
 
 def normalize_extracted_text(s: str) -> str:
@@ -161,10 +242,10 @@ def normalize_extracted_text(s: str) -> str:
     s = s.replace("\r\n", "\n").replace("\r", "\n")
 
     # Fix hyphenation across line breaks (letters-hyphen-newline-letters)
-    s = re.sub(r"([A-Za-z])-\n([A-Za-z])", r"\1\2", s)
+    s = HYPHEN_BREAK_RE.sub(r"\1\2", s)
 
     # Remove repeated blank lines
-    s = re.sub(r"\n{3,}", "\n\n", s)
+    s = BLANK_LINES_RE.sub("\n\n", s)
 
     # Trim each line
     s = "\n".join(line.rstrip() for line in s.splitlines())
@@ -172,38 +253,99 @@ def normalize_extracted_text(s: str) -> str:
     return s.strip()
 
 
+def contiguous_runs(indices: List[int], max_len: int) -> List[List[int]]:
+    """
+    Group sorted page indices into runs of consecutive pages (at most max_len
+    pages each), e.g. [3, 4, 5, 9] -> [[3, 4, 5], [9]].
+    """
+    runs: List[List[int]] = []
+    for i in indices:
+        if runs and i == runs[-1][-1] + 1 and len(runs[-1]) < max_len:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+
+def ocr_run_worker(pdf_path: str, indices: List[int]) -> List[Tuple[int, str]]:
+    """
+    Process-pool entry point: OCR one run of consecutive pages and return
+    [(page_index, raw OCR text), ...].
+    """
+    texts = ocr_pdf_pages(Path(pdf_path), indices[0], indices[-1])
+    return list(zip(indices, texts))
+
+
+def ocr_cache_path(pdf_hash: str, page_index_zero_based: int) -> Path:
+    return OCR_CACHE_DIR / f"{pdf_hash}_p{page_index_zero_based + 1:03d}.txt"
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """Write via a temp file + rename so an interrupted run leaves no partial file."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
 # ------------------------
 # Parsing courses from text
 # ------------------------
 
-COURSE_HEADER_RE = re.compile(
-    r"^\s*(\d{1,2}\.\d{3})\s+([A-Z0-9].*?)\s*$"
-)
+# Multiline (inline (?m), so the same pattern works for re2 and re) so one
+# finditer scans all pages at once; [^\S\n] is "whitespace on the same
+# line", keeping each match inside a single line. With google-re2 installed
+# the scan runs on its linear-time automaton instead of backtracking.
+COURSE_HEADER_PATTERN = r"(?m)^[^\S\n]*(\d{1,2}\.\d{3})[^\S\n]+([A-Z0-9].*?)[^\S\n]*$"
+COURSE_HEADER_RE = (re2 or re).compile(COURSE_HEADER_PATTERN)
 # MIT subjects are like 1.001, 6.100, 21H.??? (but 1996 often uses 2 digits dot 3 digits)
 # This regex targets the classic 1.125 style requested.
 
+# Admin lines dropped from descriptions. The lowercase prefix test is a cheap
+# C-level filter; the regex then confirms the word boundary (so e.g.
+# "Laboratory ..." narrative lines are kept, as before).
+ADMIN_PREFIXES = (
+    "prereq", "units", "lecture", "lab", "recitation", "instructor",
+    "textbook", "coreq", "same subject as",
+)
+ADMIN_LINE_RE = re.compile(
+    r"^(Prereq|Units|Lecture|Lab|Recitation|Instructors?|Textbook|Coreq|Same subject as)\b",
+    re.I,
+)
+
 def parse_courses_from_pages(
     page_texts: List[str],
     source_pdf: str,
 ) -> List[MITCourse1996]:
     """
-    Scan through text line-by-line and detect course entries.
-    Start a new course when we see a header like: '1.125 Title...'
-    Accumulate following lines until the next header.
+    Detect course entries across all pages of one PDF.
+    page_texts must already be normalized (normalize_extracted_text), as
+    main() does once per page; they are not normalized again here.
+    Pages are joined into one string and scanned with a single
+    COURSE_HEADER_RE.finditer; each course block is the text between a
+    header like '1.125 Title...' and the next header. A table of page start
+    offsets maps each header back to its (1-based) page number.
     """
     courses: List[MITCourse1996] = []
 
-    current_num: Optional[str] = None
-    current_title: Optional[str] = None
-    current_lines: List[str] = []
-    current_start_page: Optional[int] = None
+    # Join non-empty pages, remembering where each one starts
+    chunks: List[str] = []
+    page_starts: List[int] = []
+    page_numbers: List[int] = []
+    offset = 0
+    for page_i, text in enumerate(page_texts, start=1):
+        if not text:
+            continue
+        chunks.append(text)
+        page_starts.append(offset)
+        page_numbers.append(page_i)
+        offset += len(text) + 1  # + "\n" separator
 
-    def flush():
-        nonlocal current_num, current_title, current_lines, current_start_page
-        if not current_num or not current_title:
-            return
+    joined = "\n".join(chunks)
+    headers = list(COURSE_HEADER_RE.finditer(joined))
 
-        block = "\n".join(current_lines).strip()
+    for i, m in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(joined)
+        block = joined[m.end():end].strip()
 
         # Heuristic: description is "block" but we remove obvious admin lines
         # like "Prereq:", "Units:", "Lecture:", etc. Keep narrative sentences.
@@ -212,7 +354,7 @@ def parse_courses_from_pages(
             l = ln.strip()
             if not l:
                 continue
-            if re.match(r"^(Prereq|Units|Lecture|Lab|Recitation|Instructors?|Textbook|Coreq|Same subject as)\b", l, re.I):
+            if l[:20].lower().startswith(ADMIN_PREFIXES) and ADMIN_LINE_RE.match(l):
                 continue
             # also skip image artifacts or lone punctuation
             if len(l) <= 2:
@@ -223,39 +365,15 @@ def parse_courses_from_pages(
 
         courses.append(
             MITCourse1996(
-                subject_number=current_num,
-                title=current_title.strip(),
+                subject_number=m.group(1),
+                title=m.group(2).strip(),
                 description=description,
                 raw_block=block,
                 source_pdf=source_pdf,
-                start_page=int(current_start_page or 1),
+                start_page=page_numbers[bisect_right(page_starts, m.start()) - 1],
             )
         )
 
-        current_num = None
-        current_title = None
-        current_lines = []
-        current_start_page = None
-
-    for page_i, raw in enumerate(page_texts, start=1):
-        text = normalize_extracted_text(raw)
-        if not text:
-            continue
-
-        for line in text.splitlines():
-            m = COURSE_HEADER_RE.match(line)
-            if m:
-                # New course found: flush previous course
-                flush()
-                current_num = m.group(1)
-                current_title = m.group(2)
-                current_lines = []
-                current_start_page = page_i
-            else:
-                if current_num is not None:
-                    current_lines.append(line)
-
-    flush()
     return courses
 
 
@@ -264,12 +382,33 @@ def parse_courses_from_pages(
 # ------------------------
 
 def main() -> None:
+    ap = argparse.ArgumentParser(description="Extract courses from the scanned 1996 MIT catalog.")
+    ap.add_argument(
+        "--force-ocr",
+        action="store_true",
+        help=f"Ignore cached OCR text in {OCR_CACHE_DIR} and OCR scanned pages again.",
+    )
+    ap.add_argument(
+        "--debug-page-text",
+        action="store_true",
+        help=f"Also write each page's final text to {TEXT_DIR} for debugging.",
+    )
+    args = ap.parse_args()
+
     RAW_DIR.mkdir(parents=True, exist_ok=True)
-    TEXT_DIR.mkdir(parents=True, exist_ok=True)
+    if args.debug_page_text:
+        TEXT_DIR.mkdir(parents=True, exist_ok=True)
+    OCR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-    pdf_urls = fetch_index_pdf_urls()
-    if not pdf_urls:
-        raise RuntimeError("No PDF URLs found from the index page.")
+    session = make_session()
+    try:
+        pdf_urls = fetch_index_pdf_urls(session)
+        if not pdf_urls:
+            raise RuntimeError("No PDF URLs found from the index page.")
+
+        download_missing_pdfs(session, pdf_urls)
+    finally:
+        session.close()
 
     all_courses: List[MITCourse1996] = []
 
@@ -277,52 +416,69 @@ def main() -> None:
         filename = url.split("/")[-1]
         pdf_path = RAW_DIR / filename
 
-        if not pdf_path.exists():
-            print(f"[info] Downloading: {url}")
-            download_file(url, pdf_path)
-        else:
-            print(f"[info] Using cached PDF: {pdf_path}")
-
         # 1) try pdfplumber text extraction
         page_texts = extract_text_pdfplumber(pdf_path)
 
         # 2) OCR fallback per-page if needed
+        pdf_hash = hashlib.sha1(pdf_path.read_bytes()).hexdigest()[:12]
         final_pages: List[str] = []
+        ocr_indices: List[int] = []
         for idx, txt in enumerate(page_texts):
             norm = normalize_extracted_text(txt)
-            if len(re.sub(r"\s+", "", norm)) >= MIN_TEXT_CHARS_BEFORE_OCR:
-                final_pages.append(norm)
+            final_pages.append(norm)
+            if len(WS_RE.sub("", norm)) >= MIN_TEXT_CHARS_BEFORE_OCR:
+                continue
+
+            # likely scanned-only page; reuse an earlier OCR of it if cached
+            cache_path = ocr_cache_path(pdf_hash, idx)
+            if not args.force_ocr and cache_path.exists():
+                final_pages[idx] = normalize_extracted_text(cache_path.read_text(encoding="utf-8"))
                 continue
 
-            # likely scanned-only page
             if pytesseract is None or convert_from_path is None:
                 # keep whatever we have (may be empty) but warn
                 print(f"[warn] Page {idx+1} in {filename} looks scanned; OCR not available. Keeping extracted text (may be empty).")
-                final_pages.append(norm)
                 continue
 
-            print(f"[info] OCR page {idx+1}/{len(page_texts)} in {filename} ...")
-            ocr_txt = ocr_pdf_page(pdf_path, idx)
-            final_pages.append(normalize_extracted_text(ocr_txt))
-
-        # Save per-page text (debuggable artifacts)
-        for i, t in enumerate(final_pages, start=1):
-            (TEXT_DIR / f"{pdf_path.stem}_p{i:03d}.txt").write_text(t + "\n", encoding="utf-8")
+            ocr_indices.append(idx)
+
+        # OCR the scanned pages in parallel and splice results back in page order
+        if ocr_indices:
+            print(f"[info] OCR {len(ocr_indices)}/{len(page_texts)} pages in {filename} ({OCR_WORKERS} workers) ...")
+            run_len = max(1, min(OCR_MAX_RUN_PAGES, -(-len(ocr_indices) // OCR_WORKERS)))
+            with ProcessPoolExecutor(max_workers=OCR_WORKERS) as ex:
+                futures = [
+                    ex.submit(ocr_run_worker, str(pdf_path), run)
+                    for run in contiguous_runs(ocr_indices, run_len)
+                ]
+                for fut in as_completed(futures):
+                    for idx, text in fut.result():
+                        write_text_atomic(ocr_cache_path(pdf_hash, idx), text)
+                        final_pages[idx] = normalize_extracted_text(text)
+                        print(f"[info] OCR page {idx+1}/{len(page_texts)} in {filename} done")
+
+        # Save per-page text (debuggable artifacts), only when asked for
+        if args.debug_page_text:
+            page_files = [
+                (TEXT_DIR / f"{pdf_path.stem}_p{i:03d}.txt", t + "\n")
+                for i, t in enumerate(final_pages, start=1)
+            ]
+            with ThreadPoolExecutor() as ex:
+                list(ex.map(lambda pt: pt[0].write_text(pt[1], encoding="utf-8"), page_files))
 
         # 3) parse courses from this PDF
         courses = parse_courses_from_pages(final_pages, source_pdf=filename)
         print(f"[done] {filename}: parsed {len(courses)} courses")
         all_courses.extend(courses)
 
-    # Deduplicate: same subject_number + title (OCR may repeat)
-    dedup = {}
+    # Deduplicate: same subject_number + title (OCR may repeat); first wins
+    dedup: Dict[Tuple[str, str], MITCourse1996] = {}
     for c in all_courses:
-        key = (c.subject_number, c.title.strip().lower())
-        if key not in dedup:
-            dedup[key] = c
+        dedup.setdefault((c.subject_number, c.title.strip().lower()), c)
 
-    final_list = [asdict(v) for v in dedup.values()]
-    final_list.sort(key=lambda x: (x["subject_number"], x["title"].lower()))
+    # The dedup key is also the sort key (titles are already stripped), so
+    # sort the unique keys directly instead of lowercasing every title again
+    final_list = [asdict(dedup[key]) for key in sorted(dedup)]
 
     OUT_JSON.write_text(json.dumps(final_list, indent=2, ensure_ascii=False), encoding="utf-8")
     print(f"[final] Wrote {len(final_list)} unique courses to {OUT_JSON}")
@@ -10,24 +10,52 @@
 from __future__ import annotations
 
 import json
+import os
 import re
 import time
-from dataclasses import dataclass, asdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from operator import attrgetter
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
+import soupsieve as sv
 from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# requests-cache is optional; it keeps fetched pages on disk between runs
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# orjson is optional; it writes the indented course list much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 BASE = "https://catalog.mit.edu"
 SUBJECTS_INDEX = f"{BASE}/subjects/"
 OUT_JSON = Path("11_mit_2024.json")
 
-# be polite
+# be polite: a few pages in flight at once, each after a short pause
 SLEEP_SECONDS = 0.25
 TIMEOUT = 30
+FETCH_WORKERS = 8
+# page parsing (bs4 + regex) is CPU-bound, so it runs in worker processes
+PARSE_WORKERS = os.cpu_count() or 1
+
+# Fetched pages are cached on disk for a day when requests-cache is installed,
+# so re-runs (e.g. while tuning the parser) don't hit the catalog again.
+# Delete the cache file to force fresh downloads.
+HTTP_CACHE = Path(".cache/mit_catalog_2024")
+HTTP_CACHE_SECONDS = 24 * 60 * 60
+
 
 # Matches common MIT subject IDs:
 #  - 6.1000
@@ -37,9 +65,58 @@ TIMEOUT = 30
 COURSE_HEADER_RE = re.compile(
     r"^\s*([0-9A-Z]{1,4}(?:\.[0-9A-Z]{1,4})+)\s+(.+?)\s*$"
 )
+# necessary condition for COURSE_HEADER_RE; rejects non-header text early
+HEADER_PREFIX_RE = re.compile(r"\s*[0-9A-Z]{1,4}\.")
+
+# main content container candidates, most specific first (compiled once)
+CONTAINER_SELECTORS = ("#content", "main", ".page_content", ".container", "body")
+CONTAINER_PATTERNS = tuple(sv.compile(sel) for sel in CONTAINER_SELECTORS)
+CONTAINER_ANY = sv.compile(", ".join(CONTAINER_SELECTORS))
+
+# tags that can carry course headers / details (built once, not per page)
+BLOCK_TAGS = ("h2", "h3", "h4", "p", "ul", "ol", "div")
+
+# precompiled patterns for the per-block / per-course cleaners
+WS_RE = re.compile(r"\s+")
+PREREQ_RE = re.compile(
+    r"\bPrereq:\s*(.+?)(?=(\b[UG]\s*\(|\b\d+\s*-\s*\d+\s*-\s*\d+\s*units\b|\b\d+\s*units\b|$))",
+    re.I,
+)
+LEVEL_TERM_RE = re.compile(r"\b([UG])\s*\(([^)]+)\)\b")
+UNITS_RE = re.compile(r"\b(\d+\s*-\s*\d+\s*-\s*\d+\s*units|\d+\s*units)\b", re.I)
+SUBJECT_MEETS_RE = re.compile(
+    r"^\s*Subject meets with\b.*?(?=\b(Presents|Introduces|Provides|Covers|Explores|Develops|Focuses|Examines|Studies|Designs|Addresses)\b)",
+    re.I,
+)
+DOT_SPACE_RE = re.compile(r"\s+\.\s+")
+LEVEL_TERM_LINE_RE = re.compile(r"[UG]\s*\(.+\)")
+INITIAL_NAME_RE = re.compile(r"[A-Z]\.\s*[A-Z][a-z]")
+
+# where a course title ends and inline prereq/units/description text begins
+TITLE_SPLIT_RES = tuple(
+    re.compile(p, re.I)
+    for p in (
+        r"\bPrereq:",
+        r"\bCoreq:",
+        r"\b[UG]\s*\(",
+        r"\b\d+\s*-\s*\d+\s*-\s*\d+\s*units\b",
+        r"\b\d+\s*units\b",
+        r"\bAcad Year\b",
+        r"\bSubject meets with\b",
+        r"\bunits arranged\b",
+        r"\bCan be repeated for credit\b",
+        r"\bNot offered regularly\b",
+        r"\bconsult department\b",
+        r"\bStaff\b",
+    )
+)
+SENTENCE_START_RE = re.compile(
+    r"(?:[.;]\s+)(Presents|Introduces|Provides|Covers|Explores|Develops|Focuses|Examines|Addresses|Emphasizes|Investigates)\b",
+    re.I,
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class MITCourse:
     course_id: str
     title: str
@@ -51,14 +128,43 @@ class MITCourse:
     source_url: str
 
 
-def get(url: str) -> str:
-    r = requests.get(url, timeout=TIMEOUT, headers={"User-Agent": "Mozilla/5.0"})
+# output key order (same as the MITCourse fields)
+COURSE_FIELDS = tuple(f.name for f in fields(MITCourse))
+course_values = attrgetter(*COURSE_FIELDS)
+
+
+def make_session() -> requests.Session:
+    """
+    One keep-alive session (single host) shared by all fetch threads, so only
+    the first request per connection pays the TCP + TLS handshake. Created in
+    main(), so importing this module (parse workers, 09_pipeline.py) opens no
+    cache file.
+    """
+    if requests_cache is not None:
+        HTTP_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        session = requests_cache.CachedSession(str(HTTP_CACHE), backend="sqlite", expire_after=HTTP_CACHE_SECONDS)
+    else:
+        session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=FETCH_WORKERS,
+            max_retries=Retry(total=3, backoff_factor=0.5),
+        ),
+    )
+    return session
+
+
+def get(session: requests.Session, url: str) -> str:
+    r = session.get(url, timeout=TIMEOUT)
     r.raise_for_status()
     return r.text
 
 
 def clean_text(s: str) -> str:
-    s = re.sub(r"\s+", " ", s or "").strip()
+    s = WS_RE.sub(" ", s or "").strip()
     return s
 
 
@@ -74,40 +180,35 @@ def peel_embedded_fields(text: str) -> tuple[str, Optional[str], Optional[str],
     level_term = None
     units = None
 
+    # Each extraction just splices the match out; the whitespace this
+    # leaves behind is collapsed once, after step 4 (the patterns in 2-4
+    # are insensitive to runs of spaces).
+
     # 1) Extract Prereq first (before removing any prefix)
-    m = re.search(
-        r"\bPrereq:\s*(.+?)(?=(\b[UG]\s*\(|\b\d+\s*-\s*\d+\s*-\s*\d+\s*units\b|\b\d+\s*units\b|$))",
-        s,
-        flags=re.I,
-    )
+    m = PREREQ_RE.search(s)
     if m:
         prereq = clean_text(m.group(1))
-        s = clean_text(s[:m.start()] + " " + s[m.end():])
+        s = s[:m.start()] + " " + s[m.end():]
 
     # 2) Extract level/term like "U (Spring)" or "G (Fall, Spring)"
-    m = re.search(r"\b([UG])\s*\(([^)]+)\)\b", s)
+    m = LEVEL_TERM_RE.search(s)
     if m:
         level_term = clean_text(f"{m.group(1)} ({m.group(2)})")
-        s = clean_text(s[:m.start()] + " " + s[m.end():])
+        s = s[:m.start()] + " " + s[m.end():]
 
     # 3) Extract units like "3-2-7 units" or "12 units"
-    m = re.search(r"\b(\d+\s*-\s*\d+\s*-\s*\d+\s*units|\d+\s*units)\b", s, flags=re.I)
+    m = UNITS_RE.search(s)
     if m:
         units = clean_text(m.group(1))
-        s = clean_text(s[:m.start()] + " " + s[m.end():])
+        s = s[:m.start()] + " " + s[m.end():]
 
     # 4) Now remove leading "Subject meets with ..." if present.
     # We remove up to the first strong narrative verb to avoid eating real content.
-    s = re.sub(
-        r"^\s*Subject meets with\b.*?(?=\b(Presents|Introduces|Provides|Covers|Explores|Develops|Focuses|Examines|Studies|Designs|Addresses)\b)",
-        "",
-        s,
-        flags=re.I,
-    )
+    s = SUBJECT_MEETS_RE.sub("", s)
     s = clean_text(s)
 
     # 5) Clean punctuation artifacts after deletions
-    s = re.sub(r"\s+\.\s+", " ", s)
+    s = DOT_SPACE_RE.sub(" ", s)
     s = clean_text(s)
 
     return s, prereq, level_term, units
@@ -122,34 +223,15 @@ def split_header_title_and_remainder(header_tail: str) -> tuple[str, str]:
     if not s:
         return "", ""
 
-    split_patterns = [
-        r"\bPrereq:",
-        r"\bCoreq:",
-        r"\b[UG]\s*\(",
-        r"\b\d+\s*-\s*\d+\s*-\s*\d+\s*units\b",
-        r"\b\d+\s*units\b",
-        r"\bAcad Year\b",
-        r"\bSubject meets with\b",
-        r"\bunits arranged\b",
-        r"\bCan be repeated for credit\b",
-        r"\bNot offered regularly\b",
-        r"\bconsult department\b",
-        r"\bStaff\b",
-    ]
-
     split_index: Optional[int] = None
-    for pattern in split_patterns:
-        m = re.search(pattern, s, flags=re.I)
+    for pattern in TITLE_SPLIT_RES:
+        m = pattern.search(s)
         if m:
             idx = m.start()
             if split_index is None or idx < split_index:
                 split_index = idx
 
-    sentence_start = re.search(
-        r"(?:[.;]\s+)(Presents|Introduces|Provides|Covers|Explores|Develops|Focuses|Examines|Addresses|Emphasizes|Investigates)\b",
-        s,
-        flags=re.I,
-    )
+    sentence_start = SENTENCE_START_RE.search(s)
     if sentence_start:
         idx = sentence_start.start(1)
         if split_index is None or idx < split_index:
@@ -167,39 +249,33 @@ def split_header_title_and_remainder(header_tail: str) -> tuple[str, str]:
 def looks_like_instructor_line(text: str) -> bool:
     return len(text) <= 80 and (
         text.lower() == "staff"
-        or re.search(r"[A-Z]\.\s*[A-Z][a-z]", text) is not None
+        or INITIAL_NAME_RE.search(text) is not None
         or "," in text
     )
 
 
 def extract_subject_urls(index_html: str) -> List[str]:
-    soup = BeautifulSoup(index_html, "html.parser")
-    urls: List[str] = []
-    for a in soup.select("a[href]"):
-        href = a.get("href", "").strip()
-        # Keep only subject pages under /subjects/<slug>/
-        if href.startswith("/subjects/") and href.count("/") >= 3:
-            # exclude PDFs and the index itself
-            if href.endswith(".pdf") or href == "/subjects/":
-                continue
-            urls.append(urljoin(BASE, href))
-
+    soup = BeautifulSoup(index_html, "lxml")
+    hrefs = (a.get("href", "").strip() for a in soup.select("a[href]"))
+    # Keep only subject pages under /subjects/<slug>/, excluding PDFs and
+    # the index itself
+    urls = (
+        urljoin(BASE, href)
+        for href in hrefs
+        if href.startswith("/subjects/") and href.count("/") >= 3 and not href.endswith(".pdf") and href != "/subjects/"
+    )
     # Deduplicate while preserving order
-    seen = set()
-    out: List[str] = []
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
+    return list(dict.fromkeys(urls))
 
 
 def pick_main_container(soup: BeautifulSoup) -> Tag:
-    # Try a few common containers; fall back to body.
-    for sel in ["#content", "main", ".page_content", ".container", "body"]:
-        node = soup.select_one(sel)
-        if node:
-            return node
+    # Try a few common containers; fall back to body. One tree walk collects
+    # every candidate, then the selectors are tried in priority order.
+    candidates = CONTAINER_ANY.select(soup)
+    for pattern in CONTAINER_PATTERNS:
+        for node in candidates:
+            if pattern.match(node):
+                return node
     return soup.body  # type: ignore
 
 
@@ -208,22 +284,29 @@ def iter_text_blocks(container: Tag) -> List[Tag]:
     Return an ordered list of tags that commonly contain content.
     We keep headers + paragraphs + lists, in document order.
     """
-    tags = container.find_all(["h2", "h3", "h4", "p", "ul", "ol", "div"], recursive=True)
+    tags = container.find_all(BLOCK_TAGS, recursive=True)
 
     # Filter out huge nav/sidebars by skipping tags with clearly irrelevant roles/classes
     out: List[Tag] = []
     for t in tags:
-        cls = " ".join(t.get("class", [])) if isinstance(t.get("class", []), list) else str(t.get("class", ""))
-        role = str(t.get("role", ""))
-        if "nav" in cls.lower() or role.lower() == "navigation":
+        # bs4 always gives class as a list; most tags have none at all
+        cls = t.get("class")
+        if cls and any("nav" in c.lower() for c in cls):
+            continue
+        role = t.get("role")
+        if role and role.lower() == "navigation":
             continue
         out.append(t)
     return out
 
 
-def parse_course_page(url: str) -> List[MITCourse]:
-    html = get(url)
-    soup = BeautifulSoup(html, "html.parser")
+def parse_course_page(url: str, html: str) -> List[MITCourse]:
+    """
+    Parse one fetched subject page into courses. Pure CPU work (no I/O), so
+    it can run in a worker process.
+    """
+    # lxml's C parser: several times faster than the pure-Python "html.parser"
+    soup = BeautifulSoup(html, "lxml")
 
     # department/program title (page H1 is usually descriptive)
     h1 = soup.find(["h1", "h2"])
@@ -286,8 +369,9 @@ def parse_course_page(url: str) -> List[MITCourse]:
         if not text:
             continue
 
-        # Detect a course header line
-        m = COURSE_HEADER_RE.match(text)
+        # Detect a course header line (cheap id-prefix check first; most
+        # blocks are description text and fail it on the first few chars)
+        m = COURSE_HEADER_RE.match(text) if HEADER_PREFIX_RE.match(text) else None
         if m:
             # Start of a new course
             flush()
@@ -329,7 +413,7 @@ def parse_course_page(url: str) -> List[MITCourse]:
                 continue
 
             # level/term line often looks like "U (IAP)" or "G (Fall, Spring)"
-            if re.fullmatch(r"[UG]\s*\(.+\)", text):
+            if LEVEL_TERM_LINE_RE.fullmatch(text):
                 continue
 
             # instructor line: many pages use names or "Staff" (not perfect, but useful)
@@ -350,33 +434,63 @@ def parse_course_page(url: str) -> List[MITCourse]:
     return courses
 
 
+def fetch_html(session: requests.Session, url: str) -> str:
+    time.sleep(SLEEP_SECONDS)
+    return get(session, url)
+
+
 def main() -> None:
-    print(f"[info] Fetching subjects index: {SUBJECTS_INDEX}")
-    index_html = get(SUBJECTS_INDEX)
-    subject_urls = extract_subject_urls(index_html)
-    print(f"[info] Found {len(subject_urls)} subject pages")
-
-    all_courses: List[MITCourse] = []
-    for i, url in enumerate(subject_urls, start=1):
-        try:
-            time.sleep(SLEEP_SECONDS)
-            courses = parse_course_page(url)
-            all_courses.extend(courses)
-            print(f"[done] ({i}/{len(subject_urls)}) {url} -> {len(courses)} courses")
-        except Exception as e:
-            print(f"[warn] Failed {url}: {e}")
-
-    # Deduplicate by (course_id, title) just in case
+    session = make_session()
+    try:
+        print(f"[info] Fetching subjects index: {SUBJECTS_INDEX}")
+        index_html = get(session, SUBJECTS_INDEX)
+        subject_urls = extract_subject_urls(index_html)
+        print(f"[info] Found {len(subject_urls)} subject pages")
+
+        # Pages are fetched on a small thread pool (network-bound) and each page
+        # is handed to a process pool for parsing (CPU-bound) as soon as it
+        # arrives. Results are collected in subject order so the output matches
+        # a sequential run.
+        all_courses: List[MITCourse] = []
+        parsed: Dict[str, Future] = {}
+        failed: Dict[str, Exception] = {}
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as fetch_ex, ProcessPoolExecutor(max_workers=PARSE_WORKERS) as parse_ex:
+            fetches = [fetch_ex.submit(fetch_html, session, url) for url in subject_urls]
+            for url, fut in zip(subject_urls, fetches):
+                try:
+                    parsed[url] = parse_ex.submit(parse_course_page, url, fut.result())
+                except Exception as e:
+                    failed[url] = e
+
+            for i, url in enumerate(subject_urls, start=1):
+                err = failed.get(url)
+                if err is None:
+                    try:
+                        courses = parsed[url].result()
+                    except Exception as e:
+                        err = e
+                if err is not None:
+                    print(f"[warn] Failed {url}: {err}")
+                    continue
+                all_courses.extend(courses)
+                print(f"[done] ({i}/{len(subject_urls)}) {url} -> {len(courses)} courses")
+    finally:
+        session.close()
+
+    # Deduplicate by (course_id, title) just in case (first one wins)
     dedup: Dict[Tuple[str, str], MITCourse] = {}
     for c in all_courses:
-        key = (c.course_id, c.title.strip().lower())
-        if key not in dedup:
-            dedup[key] = c
+        dedup.setdefault((c.course_id, c.title.strip().lower()), c)
 
-    final_list = [asdict(v) for v in dedup.values()]
-    final_list.sort(key=lambda x: (x["course_id"], x["title"].lower()))
+    # Fields are flat strings, so a plain attrgetter row replaces asdict()'s
+    # recursive deep copy
+    ordered = sorted(dedup.values(), key=lambda c: (c.course_id, c.title.lower()))
+    final_list = [dict(zip(COURSE_FIELDS, course_values(c))) for c in ordered]
 
-    OUT_JSON.write_text(json.dumps(final_list, indent=2, ensure_ascii=False), encoding="utf-8")
+    if orjson is not None:
+        OUT_JSON.write_bytes(orjson.dumps(final_list, option=orjson.OPT_INDENT_2))
+    else:
+        OUT_JSON.write_text(json.dumps(final_list, indent=2, ensure_ascii=False), encoding="utf-8")
     print(f"[final] Wrote {len(final_list)} unique courses -> {OUT_JSON}")
 
 
@@ -15,13 +15,20 @@ from __future__ import annotations
 
 import json
 import math
-import re
+import string
 from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+
+# orjson is optional; it parses the catalog JSON straight from bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 IN_1996_JSON = Path("10_mit_1996.json")
@@ -36,15 +43,20 @@ OUT_CSV = OUT_DIR / "course_offerings_by_dept.csv"
 OUT_PNG_EXPAND = OUT_DIR / "top_changes_expanded.png"
 OUT_PNG_REDUCE = OUT_DIR / "top_changes_reduced.png"
 
+# department proxy: the id prefix before the first dot ('21H.001' -> '21H'),
+# made only of these characters
+DEPT_CHARS = string.digits + string.ascii_uppercase
+
 
 def load_json_flexible(path_json: Path, path_txt: Path) -> List[Dict[str, Any]]:
     """
     Load JSON from either .json or .txt (if .txt contains JSON).
     """
-    if path_json.exists():
-        return json.loads(path_json.read_text(encoding="utf-8"))
-    if path_txt.exists():
-        return json.loads(path_txt.read_text(encoding="utf-8"))
+    for path in (path_json, path_txt):
+        if path.exists():
+            if orjson is not None:
+                return orjson.loads(path.read_bytes())
+            return json.loads(path.read_text(encoding="utf-8"))
     raise FileNotFoundError(f"Missing input file: {path_json} (or {path_txt})")
 
 
@@ -54,10 +66,10 @@ def dept_from_1996(subject_number: str) -> Optional[str]:
     """
     if not subject_number:
         return None
-    m = re.match(r"^\s*([0-9A-Z]+)\.", str(subject_number).strip())
-    if not m:
+    dept, dot, _ = str(subject_number).strip().partition(".")
+    if not dot or not dept or dept.strip(DEPT_CHARS):
         return None
-    return m.group(1)
+    return dept
 
 
 def dept_from_2024(course_id: str) -> Optional[str]:
@@ -68,29 +80,19 @@ def dept_from_2024(course_id: str) -> Optional[str]:
     """
     if not course_id:
         return None
-    s = str(course_id).strip()
-    m = re.match(r"^\s*([0-9A-Z]+)\.", s)
-    if not m:
+    dept, dot, _ = str(course_id).strip().partition(".")
+    if not dot or not dept or dept.strip(DEPT_CHARS):
         return None
-    return m.group(1)
+    return dept
 
 
 def count_by_dept_1996(rows: List[Dict[str, Any]]) -> Counter:
-    c = Counter()
-    for r in rows:
-        dept = dept_from_1996(r.get("subject_number", ""))
-        if dept:
-            c[dept] += 1
-    return c
+    # Counter consumes the (non-empty) prefixes in one C-level pass
+    return Counter(filter(None, map(dept_from_1996, (r.get("subject_number", "") for r in rows))))
 
 
 def count_by_dept_2024(rows: List[Dict[str, Any]]) -> Counter:
-    c = Counter()
-    for r in rows:
-        dept = dept_from_2024(r.get("course_id", ""))
-        if dept:
-            c[dept] += 1
-    return c
+    return Counter(filter(None, map(dept_from_2024, (r.get("course_id", "") for r in rows))))
 
 
 @dataclass
@@ -124,9 +126,10 @@ def write_csv(changes: List[DeptChange]) -> None:
     OUT_CSV.write_text("".join(lines), encoding="utf-8")
 
 
-def plot_top_changes(changes: List[DeptChange], out_path: Path, kind: str, top_n: int = 15) -> None:
+def plot_top_changes(ax: Axes, changes: List[DeptChange], out_path: Path, kind: str, top_n: int = 15) -> None:
     """
     kind: 'expand' or 'reduce'
+    Draws on (and clears) the given axes, so one figure serves every plot.
     """
     if kind == "expand":
         subset = sorted(changes, key=lambda x: x.delta, reverse=True)[:top_n]
@@ -138,15 +141,14 @@ def plot_top_changes(changes: List[DeptChange], out_path: Path, kind: str, top_n
     depts = [x.dept for x in subset]
     deltas = [x.delta for x in subset]
 
-    plt.figure(figsize=(10, 6))
-    plt.bar(depts, deltas)
-    plt.title(title)
-    plt.xlabel("Department (course number prefix)")
-    plt.ylabel("Change in course count")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
-    plt.close()
+    ax.clear()
+    ax.bar(depts, deltas)
+    ax.set_title(title)
+    ax.set_xlabel("Department (course number prefix)")
+    ax.set_ylabel("Change in course count")
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+    ax.figure.tight_layout()
+    ax.figure.savefig(out_path, dpi=200)
 
 
 def print_summary(changes: List[DeptChange]) -> None:
@@ -195,8 +197,10 @@ def main() -> None:
 
     # Save table + plots
     write_csv(changes)
-    plot_top_changes(changes, OUT_PNG_EXPAND, kind="expand", top_n=15)
-    plot_top_changes(changes, OUT_PNG_REDUCE, kind="reduce", top_n=15)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    plot_top_changes(ax, changes, OUT_PNG_EXPAND, kind="expand", top_n=15)
+    plot_top_changes(ax, changes, OUT_PNG_REDUCE, kind="reduce", top_n=15)
+    plt.close(fig)
 
     # Print summary
     print(f"[done] Loaded 1996 courses: {len(data_1996)}")
@@ -12,13 +12,21 @@ from __future__ import annotations
 
 import csv
 import json
-import math
 import re
 from collections import Counter
+from itertools import chain
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
 import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+import numpy as np
+
+# orjson is optional; it parses the catalog JSON straight from bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 IN_1996 = Path("10_mit_1996.json")
@@ -33,7 +41,7 @@ TOP_N_PRINT = 25
 TOP_N_PLOT = 20
 
 # Stopwords: keep practical + add some catalog-generic words if desired
-STOPWORDS = {
+STOPWORDS = frozenset({
     "a","an","and","are","as","at","be","by","for","from",
     "in","into","is","it","of","on","or","the","to","with",
     "without","via","ii","iii","iv","v","vi","vii","viii",
@@ -47,7 +55,11 @@ STOPWORDS = {
     "none","meets","limited","arranged","version",
     "staff","department","term","repeated","can","that",
     "not",
-}
+})
+
+# a token is a maximal run of [a-z0-9] containing at least one letter
+# (so pure numbers never match)
+WORD_RE = re.compile(r"[a-z0-9]*[a-z][a-z0-9]*")
 
 # Remove very short tokens (often noise)
 MIN_TOKEN_LEN = 2
@@ -59,6 +71,8 @@ ALPHA = 1.0
 def load_json(path: Path) -> List[dict]:
     if not path.exists():
         raise FileNotFoundError(f"Missing input: {path}")
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
     return json.loads(path.read_text(encoding="utf-8"))
 
 
@@ -80,36 +94,21 @@ def tokenize_title(title: str) -> List[str]:
     - remove pure numbers
     - remove stopwords
     """
-    s = title.lower()
-    # replace non-alphanumeric with spaces
-    s = re.sub(r"[^a-z0-9]+", " ", s)
-    tokens = [t for t in s.split() if t]
-
-    out: List[str] = []
-    for t in tokens:
-        if t.isdigit():
-            continue
-        if len(t) < MIN_TOKEN_LEN:
-            continue
-        if t in STOPWORDS:
-            continue
-        out.append(t)
-    return out
+    return [t for t in WORD_RE.findall(title.lower()) if len(t) >= MIN_TOKEN_LEN and t not in STOPWORDS]
 
 
 def count_words(titles: Iterable[str]) -> Counter:
-    c = Counter()
-    for title in titles:
-        for w in tokenize_title(title):
-            c[w] += 1
-    return c
+    # one flat token stream, so Counter does the counting loop in C
+    return Counter(chain.from_iterable(map(tokenize_title, titles)))
 
 
 def relative_freq(counter: Counter) -> Dict[str, float]:
     total = sum(counter.values())
     if total == 0:
         return {}
-    return {w: n / total for w, n in counter.items()}
+    # one vectorized division over the whole vocabulary
+    counts = np.fromiter(counter.values(), dtype=np.float64, count=len(counter))
+    return dict(zip(counter, (counts / total).tolist()))
 
 
 def log_ratio_shift(
@@ -125,12 +124,10 @@ def log_ratio_shift(
     Positive => more characteristic of 2024
     Negative => more characteristic of 1996
     """
-    out: Dict[str, float] = {}
-    for w in vocab:
-        a = f_2024.get(w, 0.0) + alpha
-        b = f_1996.get(w, 0.0) + alpha
-        out[w] = math.log(a / b)
-    return out
+    words = list(vocab)
+    a = np.fromiter((f_2024.get(w, 0.0) for w in words), dtype=np.float64, count=len(words)) + alpha
+    b = np.fromiter((f_1996.get(w, 0.0) for w in words), dtype=np.float64, count=len(words)) + alpha
+    return dict(zip(words, np.log(a / b).tolist()))
 
 
 def write_csv(
@@ -143,38 +140,37 @@ def write_csv(
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     vocab = sorted(set(c96.keys()) | set(c24.keys()))
 
-    with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(
-            f,
-            fieldnames=["word", "count_1996", "count_2024", "freq_1996", "freq_2024", "log_ratio_2024_vs_1996"],
+    rows = (
+        (
+            word,
+            int(c96.get(word, 0)),
+            int(c24.get(word, 0)),
+            f"{f96.get(word, 0.0):.8f}",
+            f"{f24.get(word, 0.0):.8f}",
+            f"{shift.get(word, 0.0):.6f}",
         )
-        w.writeheader()
-        for word in vocab:
-            w.writerow(
-                {
-                    "word": word,
-                    "count_1996": int(c96.get(word, 0)),
-                    "count_2024": int(c24.get(word, 0)),
-                    "freq_1996": f"{f96.get(word, 0.0):.8f}",
-                    "freq_2024": f"{f24.get(word, 0.0):.8f}",
-                    "log_ratio_2024_vs_1996": f"{shift.get(word, 0.0):.6f}",
-                }
-            )
-
-
-def plot_top_words(words: List[Tuple[str, float]], out_path: Path, title: str) -> None:
+        for word in vocab
+    )
+
+    with open(OUT_CSV, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        w = csv.writer(f)
+        w.writerow(("word", "count_1996", "count_2024", "freq_1996", "freq_2024", "log_ratio_2024_vs_1996"))
+        w.writerows(rows)
+
+
+def plot_top_words(ax: Axes, words: List[Tuple[str, float]], out_path: Path, title: str) -> None:
+    # draws on (and clears) the given axes, so one figure serves every plot
     labels = [w for w, _ in words]
     vals = [v for _, v in words]
 
-    plt.figure(figsize=(10, 6))
-    plt.bar(labels, vals)
-    plt.title(title)
-    plt.xlabel("Word")
-    plt.ylabel("Log ratio (smoothed)")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
-    plt.close()
+    ax.clear()
+    ax.bar(labels, vals)
+    ax.set_title(title)
+    ax.set_xlabel("Word")
+    ax.set_ylabel("Log ratio (smoothed)")
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+    ax.figure.tight_layout()
+    ax.figure.savefig(out_path, dpi=200)
 
 
 def main() -> None:
@@ -202,8 +198,10 @@ def main() -> None:
 
     # plots
     OUT_DIR.mkdir(parents=True, exist_ok=True)
-    plot_top_words(more_2024[:TOP_N_PLOT], OUT_PNG_2024, f"Words more characteristic of 2024 (top {TOP_N_PLOT})")
-    plot_top_words(more_1996[:TOP_N_PLOT], OUT_PNG_1996, f"Words more characteristic of 1996 (top {TOP_N_PLOT})")
+    fig, ax = plt.subplots(figsize=(10, 6))
+    plot_top_words(ax, more_2024[:TOP_N_PLOT], OUT_PNG_2024, f"Words more characteristic of 2024 (top {TOP_N_PLOT})")
+    plot_top_words(ax, more_1996[:TOP_N_PLOT], OUT_PNG_1996, f"Words more characteristic of 1996 (top {TOP_N_PLOT})")
+    plt.close(fig)
 
     # print summary
     print(f"[done] 1996 titles: {len(titles_1996)} | unique words: {len(c96)}")
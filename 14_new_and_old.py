@@ -10,21 +10,35 @@
 
 from __future__ import annotations
 
+import csv
 import json
-import re
+import string
+from itertools import chain, repeat
 from pathlib import Path
 from typing import Set
 
+# orjson is optional; it parses the catalog JSON straight from bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 IN_1996 = Path("10_mit_1996.json")
 IN_2024 = Path("11_mit_2024.json")
 
 OUT_DIR = Path("data/subject_changes")
 OUT_CSV = OUT_DIR / "subject_changes.csv"
 
+# subject prefix: the id part before the first dot ('21G.001' -> '21G'),
+# made only of these characters
+PREFIX_CHARS = string.digits + string.ascii_uppercase
+
 
 def load_json(path: Path):
     if not path.exists():
         raise FileNotFoundError(f"Missing input file: {path}")
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
     return json.loads(path.read_text(encoding="utf-8"))
 
 
@@ -35,8 +49,8 @@ def subject_prefix_1996(subject_number: str) -> str | None:
     """
     if not subject_number:
         return None
-    m = re.match(r"^([0-9A-Z]+)\.", subject_number.strip())
-    return m.group(1) if m else None
+    prefix, dot, _ = subject_number.strip().partition(".")
+    return prefix if dot and prefix and not prefix.strip(PREFIX_CHARS) else None
 
 
 def subject_prefix_2024(course_id: str) -> str | None:
@@ -48,26 +62,16 @@ def subject_prefix_2024(course_id: str) -> str | None:
     """
     if not course_id:
         return None
-    m = re.match(r"^([0-9A-Z]+)\.", course_id.strip())
-    return m.group(1) if m else None
+    prefix, dot, _ = course_id.strip().partition(".")
+    return prefix if dot and prefix and not prefix.strip(PREFIX_CHARS) else None
 
 
 def collect_subjects_1996(data) -> Set[str]:
-    subjects = set()
-    for r in data:
-        s = subject_prefix_1996(r.get("subject_number", ""))
-        if s:
-            subjects.add(s)
-    return subjects
+    return {s for r in data if (s := subject_prefix_1996(r.get("subject_number", "")))}
 
 
 def collect_subjects_2024(data) -> Set[str]:
-    subjects = set()
-    for r in data:
-        s = subject_prefix_2024(r.get("course_id", ""))
-        if s:
-            subjects.add(s)
-    return subjects
+    return {s for r in data if (s := subject_prefix_2024(r.get("course_id", "")))}
 
 
 def main():
@@ -83,14 +87,16 @@ def main():
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    with open(OUT_CSV, "w", encoding="utf-8") as f:
-        f.write("category,subject_prefix\n")
-        for s in discontinued:
-            f.write(f"discontinued,{s}\n")
-        for s in new_subjects:
-            f.write(f"new,{s}\n")
-        for s in persistent:
-            f.write(f"persistent,{s}\n")
+    with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(("category", "subject_prefix"))
+        w.writerows(
+            chain(
+                zip(repeat("discontinued"), discontinued),
+                zip(repeat("new"), new_subjects),
+                zip(repeat("persistent"), persistent),
+            )
+        )
 
     print(f"[done] 1996 subjects: {len(subj_1996)}")
     print(f"[done] 2024 subjects: {len(subj_2024)}")
@@ -10,14 +10,30 @@
 
 from __future__ import annotations
 
+import csv
 import json
-import math
 import re
+import string
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
 
 import matplotlib.pyplot as plt
+import numpy as np
+
+# orjson is optional; it parses the catalog JSON straight from bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyahocorasick is optional; its automaton finds every keyword in one C pass
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 
 IN_1996 = Path("10_mit_1996.json")
@@ -89,17 +105,72 @@ TOPICS: Dict[str, Set[str]] = {
 }
 
 
-STOPWORDS = {
-    "a","an","and","are","as","at","be","by","for","from","in","into","is","it",
-    "of","on","or","the","to","with","without","via","i","ii","iii","iv","v","vi",
-    "vii","viii","ix","x",
+def build_key_topics(topics: Dict[str, Set[str]]) -> Dict[str, FrozenSet[str]]:
+    """
+    keyword -> topics of that keyword and of every shorter keyword that is a
+    prefix of it ("artificial" also carries the topics of "art"), so the
+    longest keyword found at a word start stands for all keywords matching there.
+    """
+    key_topics: Dict[str, Set[str]] = defaultdict(set)
+    for topic, keys in topics.items():
+        for k in keys:
+            key_topics[k].add(topic)
+    return {
+        k: frozenset().union(*(ts for other, ts in key_topics.items() if k.startswith(other)))
+        for k in key_topics
+    }
+
+
+KEY_TO_TOPICS = build_key_topics(TOPICS)
+
+# Topic i is bit i of a course's topic mask (and column i of the topic matrix)
+TOPIC_NAMES: List[str] = [*TOPICS, "Other/Unclassified"]
+TOPIC_BITS: Dict[str, int] = {t: 1 << i for i, t in enumerate(TOPIC_NAMES)}
+OTHER_MASK = TOPIC_BITS["Other/Unclassified"]
+
+# keyword -> OR of its topics' bits
+KEY_TO_MASK: Dict[str, int] = {
+    k: sum(TOPIC_BITS[t] for t in topics) for k, topics in KEY_TO_TOPICS.items()
 }
 
+# number of topics in every possible mask, indexed by the mask itself
+POPCOUNT = np.array([i.bit_count() for i in range(1 << len(TOPIC_NAMES))], dtype=np.int64)
+
+# Any keyword at the start of an [a-z0-9] run (i.e. a token), longest first so
+# the match is the longest keyword that prefixes the token. Stopwords and
+# all-digit tokens never start with a keyword, so they need no filtering.
+KEYWORD_RE = re.compile(
+    r"(?<![a-z0-9])(?:"
+    + "|".join(sorted(map(re.escape, KEY_TO_TOPICS), key=len, reverse=True))
+    + ")"
+)
+
+# MIT subject prefix: everything before the first dot ("21H.001" -> "21H")
+DEPT_RE = re.compile(r"([0-9A-Z]+)\.")
+
+# characters that continue a token; a keyword only counts after none of these
+TOKEN_CHARS = frozenset(string.ascii_lowercase + string.digits)
+
+
+def build_keyword_automaton(key_masks: Dict[str, int]):
+    """Aho-Corasick automaton over all keywords; values are (len(key), topic mask)."""
+    automaton = ahocorasick.Automaton()
+    for key, mask in key_masks.items():
+        automaton.add_word(key, (len(key), mask))
+    automaton.make_automaton()
+    return automaton
+
+
+KEYWORD_AUTOMATON = build_keyword_automaton(KEY_TO_MASK) if ahocorasick is not None else None
+
 
 def load_json(path: Path) -> List[dict]:
     if not path.exists():
         raise FileNotFoundError(f"Missing input file: {path}")
-    return json.loads(path.read_text(encoding="utf-8"))
+    # both parsers take the raw bytes, skipping the decode-to-str copy
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_bytes())
 
 
 def dept_prefix_from_id(course_id: str) -> Optional[str]:
@@ -111,55 +182,75 @@ def dept_prefix_from_id(course_id: str) -> Optional[str]:
     """
     if not course_id:
         return None
-    m = re.match(r"^([0-9A-Z]+)\.", str(course_id).strip())
+    # callers pass ids already str()-ed and stripped
+    m = DEPT_RE.match(course_id)
     return m.group(1) if m else None
 
 
-def tokenize(text: str) -> List[str]:
-    s = (text or "").lower()
-    s = re.sub(r"[^a-z0-9]+", " ", s)
-    toks = [t for t in s.split() if t and t not in STOPWORDS and not t.isdigit()]
-    return toks
-
+@lru_cache(maxsize=None)
+def classify_mask(text: str) -> int:
+    """
+    Topic bitmask (see TOPIC_BITS) of one lowercased title + description text.
+    Plain int ORs: no per-course set of topic names is built.
 
-def classify_topics(title: str, desc: str) -> Set[str]:
+    Cached: cross-listed subjects repeat the same title and description
+    under different ids.
     """
-    Multi-label topic assignment by keyword match.
+    # one scan of the whole text; prefix match allows keys like "comput"
+    # to match "computational"
+    mask = 0
+    if KEYWORD_AUTOMATON is not None:
+        # the automaton reports keywords anywhere; keep those at a token start
+        for end, (n, key_mask) in KEYWORD_AUTOMATON.iter(text):
+            start = end - n + 1
+            if start == 0 or text[start - 1] not in TOKEN_CHARS:
+                mask |= key_mask
+    else:
+        for m in KEYWORD_RE.finditer(text):
+            mask |= KEY_TO_MASK[m.group()]
+    return mask or OTHER_MASK
+
+
+def classify_topics(text_lower: str) -> Set[str]:
+    """
+    Multi-label topic assignment by keyword match, on the lowercased
+    "title description" text of a course.
     Uses stems-ish matching by allowing "comput" match for computing, etc.
     """
-    toks = tokenize(f"{title} {desc}")
-    topics = set()
-    for topic, keys in TOPICS.items():
-        for t in toks:
-            # prefix match allows keys like "comput" to match "computational"
-            if any(t.startswith(k) for k in keys):
-                topics.add(topic)
-                break
-    if not topics:
-        topics.add("Other/Unclassified")
-    return topics
-
-
-def shannon_entropy(counts: Dict[str, int]) -> float:
-    total = sum(counts.values())
-    if total == 0:
-        return 0.0
-    ent = 0.0
-    for n in counts.values():
-        p = n / total
-        ent -= p * math.log(p)
-    return ent
-
-
-def hhi_from_counts(counts: Dict[str, int]) -> float:
+    mask = classify_mask(text_lower)
+    return {t for t, bit in TOPIC_BITS.items() if mask & bit}
+
+
+def count_array(counts: Union[Dict[str, int], np.ndarray]) -> np.ndarray:
+    """Counts as an int array: a dict's values, or an array as-is."""
+    if isinstance(counts, dict):
+        return np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    return np.asarray(counts)
+
+
+def shannon_entropy(counts: Union[Dict[str, int], np.ndarray]) -> Union[float, np.ndarray]:
+    """
+    Entropy of a count distribution; for a 2-D array, one value per row.
+    Empty distributions (total 0) give 0.0.
+    """
+    c = count_array(counts)
+    total = c.sum(axis=-1, keepdims=True)
+    p = np.divide(c, total, out=np.zeros(c.shape), where=total > 0)
+    logp = np.log(p, out=np.zeros_like(p), where=p > 0)
+    ent = 0.0 - (p * logp).sum(axis=-1)
+    return float(ent) if ent.ndim == 0 else ent
+
+
+def hhi_from_counts(counts: Union[Dict[str, int], np.ndarray]) -> Union[float, np.ndarray]:
     """
     Herfindahl-Hirschman Index of topic concentration:
       sum(p_i^2). Higher => more concentrated/specialized.
+    Computed as sum(n_i^2) / N^2, in integers until the one division.
     """
-    total = sum(counts.values())
-    if total == 0:
-        return 0.0
-    return sum((n / total) ** 2 for n in counts.values())
+    c = count_array(counts)
+    total = c.sum(axis=-1)
+    hhi = np.divide((c * c).sum(axis=-1), total * total, out=np.zeros(total.shape), where=total > 0)
+    return float(hhi) if hhi.ndim == 0 else hhi
 
 
 def analyze_catalog(rows: List[dict], year: str, id_field: str) -> dict:
@@ -170,48 +261,66 @@ def analyze_catalog(rows: List[dict], year: str, id_field: str) -> dict:
       - avg_topics_per_course
       - dept_metrics: {dept: {n_courses, entropy, hhi}}
     """
-    topic_counts = Counter()
-    dept_topic_counts: Dict[str, Counter] = defaultdict(Counter)
-
-    multi = 0
-    total = 0
-    topic_sum = 0
-
+    # Column-wise, as a DataFrame would: select the usable rows once, classify
+    # the whole text column in one pass, then reduce
+    ids: List[str] = []
+    texts: List[str] = []
     for r in rows:
-        cid = str(r.get(id_field, "")).strip()
         title = str(r.get("title", "")).strip()
-        desc = str(r.get("description", "")).strip()
-
         if not title:
             continue
-
-        topics = classify_topics(title, desc)
-        total += 1
-        topic_sum += len(topics)
-        if len(topics) > 1:
-            multi += 1
-
-        for t in topics:
-            topic_counts[t] += 1
-
-        dept = dept_prefix_from_id(cid) if cid else None
-        if dept:
-            for t in topics:
-                dept_topic_counts[dept][t] += 1
+        desc = str(r.get("description", "")).strip()
+        ids.append(str(r.get(id_field, "")).strip())
+        # the only form classification needs, built once per course
+        texts.append(f"{title} {desc}".lower())
+
+    masks = np.fromiter(map(classify_mask, texts), dtype=np.uint16, count=len(texts))
+    depts = [dept_prefix_from_id(cid) if cid else None for cid in ids]
+
+    # (course x topic) membership matrix, decoded from the masks' bits; the
+    # topic and department counts below are reductions of it
+    m = ((masks[:, None] >> np.arange(len(TOPIC_NAMES), dtype=np.uint16)) & 1).astype(np.bool_)
+
+    # topics per course straight from the masks: one table lookup each
+    n_topics = POPCOUNT[masks]
+    total = len(masks)
+    topic_sum = int(n_topics.sum())
+    multi = int(np.count_nonzero(n_topics > 1))
+
+    topic_counts = {TOPIC_NAMES[i]: n for i, n in enumerate(m.sum(axis=0).tolist()) if n}
+
+    # Factorize departments (first-appearance order, -1 = none). Every
+    # (dept, topic) pair then maps to one flat index, so a single bincount
+    # counts them all and a reshape pivots the result to dept x topic
+    dept_codes: Dict[str, int] = {}
+    course_dept = np.array(
+        [dept_codes.setdefault(d, len(dept_codes)) if d else -1 for d in depts], dtype=np.int64
+    )
+    course_i, topic_i = np.nonzero(m)
+    pair_dept = course_dept[course_i]
+    keep = pair_dept >= 0
+    flat = pair_dept[keep] * len(TOPIC_NAMES) + topic_i[keep]
+    dept_topic = np.bincount(flat, minlength=len(dept_codes) * len(TOPIC_NAMES)).reshape(
+        len(dept_codes), len(TOPIC_NAMES)
+    )
 
     multi_topic_rate = (multi / total) if total else 0.0
     avg_topics_per_course = (topic_sum / total) if total else 0.0
 
-    dept_metrics = []
-    for dept, c in dept_topic_counts.items():
-        dept_metrics.append(
-            {
-                "dept": dept,
-                "n_courses": sum(c.values()),
-                "topic_entropy": shannon_entropy(c),
-                "topic_hhi": hhi_from_counts(c),
-            }
-        )
+    # Per-department entropy / HHI, one row of dept_topic each
+    n_courses = dept_topic.sum(axis=1)
+    entropy = shannon_entropy(dept_topic)
+    hhi = hhi_from_counts(dept_topic)
+
+    dept_metrics = [
+        {
+            "dept": dept,
+            "n_courses": n,
+            "topic_entropy": e,
+            "topic_hhi": h,
+        }
+        for dept, n, e, h in zip(dept_codes, n_courses.tolist(), entropy.tolist(), hhi.tolist())
+    ]
 
     # Sort: most specialized first by HHI (high concentration)
     dept_metrics.sort(key=lambda x: x["topic_hhi"], reverse=True)
@@ -226,9 +335,17 @@ def analyze_catalog(rows: List[dict], year: str, id_field: str) -> dict:
     }
 
 
+def analyze_file(path: Path, year: str, id_field: str) -> dict:
+    """
+    load_json + analyze_catalog in one call. Runs in a worker process, so the
+    rows are parsed there instead of being pickled over from the parent.
+    """
+    return analyze_catalog(load_json(path), year=year, id_field=id_field)
+
+
 def plot_topic_shares(topic_counts: Dict[str, int], out_path: Path, title: str, top_n: int = 12) -> None:
-    items = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)
-    top = items[:top_n]
+    # heap-based top-n; ties keep the topic_counts order like a stable sort
+    top = Counter(topic_counts).most_common(top_n)
     labels = [k for k, _ in top]
     values = [v for _, v in top]
 
@@ -249,29 +366,37 @@ def write_topic_csv(a96: dict, a24: dict) -> None:
     total96 = sum(a96["topic_counts"].values()) or 1
     total24 = sum(a24["topic_counts"].values()) or 1
 
-    lines = ["topic,count_1996,share_1996,count_2024,share_2024\n"]
+    rows = []
     for t in all_topics:
         c96 = a96["topic_counts"].get(t, 0)
         c24 = a24["topic_counts"].get(t, 0)
-        lines.append(f"{t},{c96},{c96/total96:.6f},{c24},{c24/total24:.6f}\n")
+        rows.append((t, c96, f"{c96/total96:.6f}", c24, f"{c24/total24:.6f}"))
 
-    OUT_TOPIC_CSV.write_text("".join(lines), encoding="utf-8")
+    # csv.writer also quotes names with commas ("Design, Architecture & Media")
+    with OUT_TOPIC_CSV.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(("topic", "count_1996", "share_1996", "count_2024", "share_2024"))
+        w.writerows(rows)
 
 
 def write_dept_top20(dept_metrics: List[dict], out_path: Path) -> None:
-    lines = ["dept,n_courses,topic_entropy,topic_hhi\n"]
-    for r in dept_metrics[:20]:
-        lines.append(f"{r['dept']},{r['n_courses']},{r['topic_entropy']:.6f},{r['topic_hhi']:.6f}\n")
-    out_path.write_text("".join(lines), encoding="utf-8")
+    with out_path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(("dept", "n_courses", "topic_entropy", "topic_hhi"))
+        w.writerows(
+            (r["dept"], r["n_courses"], f"{r['topic_entropy']:.6f}", f"{r['topic_hhi']:.6f}")
+            for r in dept_metrics[:20]
+        )
 
 
 def main() -> None:
-    data_1996 = load_json(IN_1996)
-    data_2024 = load_json(IN_2024)
-
+    # The two catalogs are independent, so each is loaded and analyzed in its
+    # own worker process; only the small result dicts come back.
     # 1996 uses subject_number as id; 2024 uses course_id
-    a96 = analyze_catalog(data_1996, year="1996", id_field="subject_number")
-    a24 = analyze_catalog(data_2024, year="2024", id_field="course_id")
+    with ProcessPoolExecutor(max_workers=2) as ex:
+        fut96 = ex.submit(analyze_file, IN_1996, "1996", "subject_number")
+        fut24 = ex.submit(analyze_file, IN_2024, "2024", "course_id")
+        a96, a24 = fut96.result(), fut24.result()
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -2,14 +2,27 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import heapq
 import json
 import math
 import os
+import pickle
 import re
+from collections import Counter
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is optional; it parses the catalog JSON straight from bytes
+try:
+	import orjson
+except ImportError:
+	orjson = None
 
 
 P1996 = Path("10_mit_1996.json")
@@ -20,33 +33,101 @@ BREADTH_TXT = Path("data/breadth/metrics_summary.txt")
 TITLE_COMPARE_CSV = Path("data/title_evolution/title_word_compare.csv")
 OUT_TXT = Path("16_summary_reflection.txt")
 
+# build_facts() results, pickled under a name derived from the inputs' mtimes
+# (see facts_cache_path); delete the folder to force a rebuild
+FACTS_CACHE_DIR = Path(".cache")
+
+# course_offerings_by_dept.csv columns used here (all written by 12_course_offerings.py)
+OFFER_COLUMNS = ("dept", "n_1996", "n_2024", "delta", "pct_change")
+
+# "<year> <label>: <value>" lines of metrics_summary.txt -> facts key prefix
+BREADTH_LABELS = {
+	"multi-topic rate": "multi",
+	"avg topics/course": "avg",
+	"topic entropy": "entropy",
+}
+BREADTH_RE = re.compile(
+	r"(1996|2024) (" + "|".join(map(re.escape, BREADTH_LABELS)) + r"):\s*([0-9.]+)"
+)
+
+
+def make_session() -> requests.Session:
+	"""
+	One keep-alive session for the LLM endpoint, so repeated calls reuse the
+	TCP + TLS connection; urllib3 retries failed connects, rate limits and
+	503 Service Unavailable.
+	"""
+	adapter = HTTPAdapter(
+		pool_connections=1,
+		pool_maxsize=1,
+		max_retries=Retry(
+			total=3,
+			# never resend a POST the server may already have accepted (and
+			# billed): no retry after read errors/timeouts or 500/502/504, only
+			# after failed connects and 429/503, which mean it was not processed
+			read=0,
+			backoff_factor=0.5,
+			status_forcelist=(429, 503),
+			# urllib3 only retries idempotent methods unless told otherwise
+			allowed_methods=("POST",),
+			# hand back the last response so raise_for_status reports it
+			raise_on_status=False,
+		),
+	)
+	session = requests.Session()
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	return session
+
+
+SESSION = make_session()
+
 
 def load_json(path: Path) -> List[dict]:
 	if not path.exists():
 		raise FileNotFoundError(f"Missing input file: {path}")
-	return json.loads(path.read_text(encoding="utf-8"))
-
-
-def load_offering_rows(path: Path) -> List[Dict[str, str]]:
+	if orjson is not None:
+		return orjson.loads(path.read_bytes())
+	return json.loads(path.read_bytes())
+
+
+def iter_csv_columns(path: Path, columns: Tuple[str, ...]) -> Iterator[Tuple[str, ...]]:
+	"""
+	Yield one tuple of str per data row holding the given columns, in the given
+	order. Column positions are looked up once in the header (a missing column
+	is a ValueError); the rows stay plain lists instead of a dict per row.
+	Blank lines and rows too short to hold every column are skipped.
+	"""
+	with path.open(encoding="utf-8", newline="") as f:
+		reader = csv.reader(f)
+		header = next(reader, [])
+		idx = {name: i for i, name in enumerate(header)}
+		missing = [name for name in columns if name not in idx]
+		if missing:
+			raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+		picks = [idx[name] for name in columns]
+		width = max(picks) + 1
+		for row in reader:
+			if len(row) >= width:
+				yield tuple(row[i] for i in picks)
+
+
+def load_offering_rows(path: Path) -> List[tuple]:
+	"""(dept, n_1996, n_2024, delta, pct_change) per department (OFFER_COLUMNS)."""
 	if not path.exists():
 		raise FileNotFoundError(f"Missing input file: {path}")
-	rows = list(csv.DictReader(path.open(encoding="utf-8")))
-	for row in rows:
-		row["n_1996"] = int(row.get("n_1996", 0))
-		row["n_2024"] = int(row.get("n_2024", 0))
-		row["delta"] = int(row.get("delta", 0))
-	return rows
+	return [
+		(dept, int(n96), int(n24), int(delta), pct)
+		for dept, n96, n24, delta, pct in iter_csv_columns(path, OFFER_COLUMNS)
+	]
 
 
 def load_subject_change_counts(path: Path) -> Dict[str, int]:
 	if not path.exists():
 		raise FileNotFoundError(f"Missing input file: {path}")
-	out = {"new": 0, "discontinued": 0, "persistent": 0}
-	for row in csv.DictReader(path.open(encoding="utf-8")):
-		cat = str(row.get("category", "")).strip().lower()
-		if cat in out:
-			out[cat] += 1
-	return out
+	# Counter tallies every category in C; only the three known ones are reported
+	counts = Counter(cat.strip().lower() for cat, in iter_csv_columns(path, ("category",)))
+	return {cat: counts[cat] for cat in ("new", "discontinued", "persistent")}
 
 
 def parse_breadth_metrics(path: Path) -> Dict[str, float]:
@@ -54,17 +135,16 @@ def parse_breadth_metrics(path: Path) -> Dict[str, float]:
 		raise FileNotFoundError(f"Missing input file: {path}")
 	txt = path.read_text(encoding="utf-8")
 
-	def grab(label: str) -> float:
-		match = re.search(rf"{re.escape(label)}:\s*([0-9.]+)", txt)
-		return float(match.group(1)) if match else float("nan")
+	# one scan for all six metrics; the first line for each label wins
+	found: Dict[str, float] = {}
+	for match in BREADTH_RE.finditer(txt):
+		key = f"{BREADTH_LABELS[match.group(2)]}_{match.group(1)}"
+		if key not in found:
+			found[key] = float(match.group(3))
 
 	return {
-		"multi_1996": grab("1996 multi-topic rate"),
-		"multi_2024": grab("2024 multi-topic rate"),
-		"avg_1996": grab("1996 avg topics/course"),
-		"avg_2024": grab("2024 avg topics/course"),
-		"entropy_1996": grab("1996 topic entropy"),
-		"entropy_2024": grab("2024 topic entropy"),
+		key: found.get(key, float("nan"))
+		for key in ("multi_1996", "multi_2024", "avg_1996", "avg_2024", "entropy_1996", "entropy_2024")
 	}
 
 
@@ -72,27 +152,36 @@ def top_shift_words(path: Path, top_n: int = 6) -> tuple[List[str], List[str]]:
 	if not path.exists():
 		return [], []
 
-	rows = list(csv.DictReader(path.open(encoding="utf-8")))
-	cleaned = []
-	for row in rows:
+	# Rows are streamed into two bounded heaps (top_n highest / lowest scores)
+	# instead of a full list sorted twice. The row number breaks score ties so
+	# the result matches a stable sort: earlier rows win.
+	high: List[Tuple[float, int, str]] = []  # (score, -row) min-heap: pops the lowest score
+	low: List[Tuple[float, int, str]] = []  # (-score, -row) min-heap: pops the highest score
+
+	def keep(heap: List[Tuple[float, int, str]], item: Tuple[float, int, str]) -> None:
+		if len(heap) < top_n:
+			heapq.heappush(heap, item)
+		else:
+			heapq.heappushpop(heap, item)
+
+	columns = ("word", "log_ratio_2024_vs_1996", "count_1996", "count_2024")
+	for i, (word, ratio, n96, n24) in enumerate(iter_csv_columns(path, columns)):
+		w = word.strip()
 		try:
-			w = str(row.get("word", "")).strip()
-			score = float(row.get("log_ratio_2024_vs_1996", 0.0))
-			c96 = int(row.get("count_1996", 0))
-			c24 = int(row.get("count_2024", 0))
-		except Exception:
+			score = float(ratio)
+			c96 = int(n96)
+			c24 = int(n24)
+		except ValueError:
 			continue
 		if not w:
 			continue
 		if (c96 + c24) < 10:
 			continue
-		cleaned.append((w, score))
+		keep(high, (score, -i, w))
+		keep(low, (-score, -i, w))
 
-	if not cleaned:
-		return [], []
-
-	more_2024 = [w for w, _ in sorted(cleaned, key=lambda x: x[1], reverse=True)[:top_n]]
-	more_1996 = [w for w, _ in sorted(cleaned, key=lambda x: x[1])[:top_n]]
+	more_2024 = [w for _, _, w in sorted(high, reverse=True)]
+	more_1996 = [w for _, _, w in sorted(low, reverse=True)]
 	return more_2024, more_1996
 
 
@@ -109,9 +198,13 @@ def build_facts() -> Dict[str, Any]:
 	breadth = parse_breadth_metrics(BREADTH_TXT)
 	words_2024, words_1996 = top_shift_words(TITLE_COMPARE_CSV)
 
-	top_expand = sorted(offer_rows, key=lambda row: row["delta"], reverse=True)[:6]
-	negative_rows = [row for row in offer_rows if row["delta"] < 0]
-	top_reduce = sorted(negative_rows, key=lambda row: row["delta"])[:3]
+	# sort the row tuples on delta; only the rows kept become dicts (for the facts JSON)
+	by_delta = itemgetter(3)
+	top_expand = sorted(offer_rows, key=by_delta, reverse=True)[:6]
+	negative_rows = [row for row in offer_rows if row[3] < 0]
+	top_reduce = sorted(negative_rows, key=by_delta)[:3]
+	top_expand = [dict(zip(OFFER_COLUMNS, row)) for row in top_expand]
+	top_reduce = [dict(zip(OFFER_COLUMNS, row)) for row in top_reduce]
 
 	growth_factor = (len(data24) / len(data96)) if len(data96) else float("nan")
 	growth_text = f"{growth_factor:.2f}x" if not math.isnan(growth_factor) else "n/a"
@@ -129,6 +222,45 @@ def build_facts() -> Dict[str, Any]:
 	}
 
 
+def facts_cache_path() -> Path:
+	"""
+	Cache file for build_facts(). Its name hashes the path, size and mtime of
+	every input plus this script, so any change to them selects a new file.
+	"""
+	h = hashlib.sha256()
+	for path in (P1996, P2024, OFFER_CSV, SUBJECT_CSV, BREADTH_TXT, TITLE_COMPARE_CSV, Path(__file__)):
+		st = path.stat() if path.exists() else None
+		h.update(f"{path}\0{st.st_size if st else -1}\0{st.st_mtime_ns if st else -1}\n".encode("utf-8"))
+	return FACTS_CACHE_DIR / f"facts_{h.hexdigest()[:16]}.pkl"
+
+
+def load_facts() -> Dict[str, Any]:
+	"""
+	build_facts(), reused from the pickle cache while no input has changed.
+	"""
+	cache = facts_cache_path()
+	if cache.exists():
+		try:
+			with cache.open("rb") as f:
+				facts = pickle.load(f)
+			print(f"[skip] inputs unchanged, facts loaded from {cache}")
+			return facts
+		except (OSError, pickle.UnpicklingError, EOFError, ValueError) as exc:
+			print(f"[warn] Facts cache {cache} unreadable ({exc}); rebuilding it.")
+
+	facts = build_facts()
+
+	# only the current key is worth keeping
+	FACTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+	for old in FACTS_CACHE_DIR.glob("facts_*.pkl"):
+		old.unlink(missing_ok=True)
+	tmp = cache.with_suffix(".tmp")
+	with tmp.open("wb") as f:
+		pickle.dump(facts, f, protocol=pickle.HIGHEST_PROTOCOL)
+	tmp.replace(cache)
+	return facts
+
+
 def render_rule_based_summary(facts: Dict[str, Any]) -> str:
 	top_expand = facts["top_expand"]
 	top_reduce = facts["top_reduce"]
@@ -221,7 +353,7 @@ def render_llm_summary(
 		"Content-Type": "application/json",
 	}
 
-	response = requests.post(endpoint, headers=headers, json=payload, timeout=timeout_seconds)
+	response = SESSION.post(endpoint, headers=headers, json=payload, timeout=timeout_seconds)
 	response.raise_for_status()
 	data = response.json()
 
@@ -260,7 +392,7 @@ def main() -> None:
 	parser.add_argument("--timeout", type=int, default=90)
 	args = parser.parse_args()
 
-	facts = build_facts()
+	facts = load_facts()
 	mode = "rule-based"
 
 	use_llm = not args.no_llm